@@ -0,0 +1,66 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from predict_labels import (load_model, predict_labels, predict_labels_native, feature_matrix, model_features,
+                            MODEL_DIR)
+
+# === CONFIG ===
+INPUT_CSV = "app/INPUT/input_unlabeled.csv"
+
+
+def synthetic_frame(df, n_rows, seed=42):
+    # Resample real rows and jitter the coordinates so trees see varied inputs
+    rng = np.random.default_rng(seed)
+    out = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    for col in ["x0", "x1", "y0", "y1", "y_pos"]:
+        out[col] = out[col] + rng.normal(0, 5, n_rows)
+    return out
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def bench(name, df, model, le, booster, repeat):
+    sk_time, sk_labels = best_of(lambda: predict_labels(df, model, le), repeat)
+    build_time, X = best_of(lambda: feature_matrix(df, model_features(booster)), repeat)
+    fast_time, fast_labels = best_of(lambda: predict_labels_native(X, booster, le), repeat)
+
+    identical = np.array_equal(sk_labels, fast_labels)
+    print(f"\n {name}: {len(df):,} rows")
+    print(f"   sklearn predict     : {sk_time * 1000:9.1f} ms")
+    print(f"   build float32 matrix: {build_time * 1000:9.1f} ms")
+    print(f"   inplace_predict     : {fast_time * 1000:9.1f} ms  "
+          f"({sk_time / max(build_time + fast_time, 1e-9):.1f}x incl. matrix)")
+    print(f"   identical labels    : {identical}")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sklearn predict with the native Booster fast path")
+    parser.add_argument("--input", default=INPUT_CSV)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--synthetic-rows", type=int, default=1_000_000)
+    parser.add_argument("--nthread", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    model, le = load_model(args.model_dir)
+    booster, _ = load_model(args.model_dir, native=True, nthread=args.nthread)
+    df = pd.read_csv(args.input)
+
+    ok = bench("input_unlabeled.csv", df, model, le, booster, args.repeat)
+    if args.synthetic_rows:
+        ok &= bench("synthetic", synthetic_frame(df, args.synthetic_rows), model, le, booster, args.repeat)
+    if not ok:
+        raise SystemExit(" Fast path labels differ from sklearn predict")
+
+
+if __name__ == "__main__":
+    main()
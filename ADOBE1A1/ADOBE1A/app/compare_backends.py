@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+from extract_features import extract_pdf_features, PDF_FOLDER
+
+# === Columns that must agree between backends ===
+FLAG_COLS = [
+    "is_bold", "is_italic", "is_uppercase",
+    "contains_colon_or_dot", "is_numbered_heading", "has_bullets_or_dashes"
+]
+NUMERIC_COLS = ["font_size", "x0", "x1", "y0", "y1", "y_pos", "page_width"]
+
+
+def run_backend(pdf_path, backend):
+    start = time.perf_counter()
+    df = extract_pdf_features(pdf_path, backend=backend)
+    return df, time.perf_counter() - start
+
+
+def compare_pdf(pdf_path):
+    ref, ref_time = run_backend(pdf_path, "pdfminer")
+    fast, fast_time = run_backend(pdf_path, "pymupdf")
+
+    result = {
+        "pdf_file": os.path.basename(pdf_path),
+        "pdfminer_s": ref_time,
+        "pymupdf_s": fast_time,
+        "pdfminer_rows": len(ref),
+        "pymupdf_rows": len(fast),
+        "columns_match": list(ref.columns) == list(fast.columns),
+    }
+    if ref.empty or fast.empty:
+        result["matched_rows"] = 0
+        return result
+
+    # Line segmentation differs slightly between engines, so compare lines
+    # that both backends produced with the same text on the same page.
+    # Repeated lines are paired top to bottom, left to right, not in emission order.
+    ref = ref.sort_values(["page", "y1", "x0"], ascending=[True, False, True], kind="stable")
+    fast = fast.sort_values(["page", "y1", "x0"], ascending=[True, False, True], kind="stable")
+    ref = ref.assign(_n=ref.groupby(["page", "text"]).cumcount())
+    fast = fast.assign(_n=fast.groupby(["page", "text"]).cumcount())
+    merged = ref.merge(fast, on=["page", "text", "_n"], suffixes=("_ref", "_fast"))
+
+    result["matched_rows"] = len(merged)
+    for col in FLAG_COLS:
+        result[f"{col}_agree"] = (merged[f"{col}_ref"] == merged[f"{col}_fast"]).mean()
+    for col in NUMERIC_COLS:
+        result[f"{col}_max_abs_diff"] = (merged[f"{col}_ref"] - merged[f"{col}_fast"]).abs().max()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check pymupdf vs pdfminer feature parity and timing")
+    parser.add_argument("--input-dir", "-i", default=PDF_FOLDER, help="Folder containing the PDFs")
+    parser.add_argument("--min-match", type=float, default=0.95,
+                        help="Fail if fewer than this share of pdfminer lines are matched")
+    parser.add_argument("--tol", type=float, default=0.5,
+                        help="Fail if any numeric column differs by more than this (points) on a matched line")
+    args = parser.parse_args()
+
+    pdfs = sorted(f for f in os.listdir(args.input_dir) if f.endswith(".pdf"))
+    if not pdfs:
+        print(f"No PDFs found in {args.input_dir}")
+        sys.exit(1)
+
+    report = pd.DataFrame([compare_pdf(os.path.join(args.input_dir, f)) for f in pdfs])
+    pd.set_option("display.width", 200)
+    print(report.T.to_string(header=False))
+
+    total_ref, total_fast = report["pdfminer_s"].sum(), report["pymupdf_s"].sum()
+    match_rate = report["matched_rows"].sum() / max(report["pdfminer_rows"].sum(), 1)
+    print(f"\n pdfminer: {total_ref:.2f}s  pymupdf: {total_fast:.2f}s  "
+          f"speedup: {total_ref / max(total_fast, 1e-9):.1f}x")
+    print(f" Matched lines: {match_rate:.1%}")
+
+    problems = []
+    if not report["columns_match"].all():
+        problems.append("feature columns differ")
+    if match_rate < args.min_match:
+        problems.append(f"matched lines {match_rate:.1%} < {args.min_match:.1%}")
+    for col in NUMERIC_COLS:
+        worst = report[f"{col}_max_abs_diff"].max() if f"{col}_max_abs_diff" in report else 0.0
+        if worst > args.tol:
+            problems.append(f"{col} differs by up to {worst:.3f} (> --tol {args.tol})")
+    for col in FLAG_COLS:
+        agree = report[f"{col}_agree"].min() if f"{col}_agree" in report else 1.0
+        if agree < 1.0:
+            problems.append(f"{col} agrees on only {agree:.1%} of matched lines")
+
+    if problems:
+        for problem in problems:
+            print(f"   {problem}")
+        print(" Parity check FAILED")
+        sys.exit(1)
+    print(" Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
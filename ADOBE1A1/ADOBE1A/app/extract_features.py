@@ -1,114 +1,509 @@
-from pdfminer.high_level import extract_pages
-from pdfminer.layout import LTTextContainer, LTChar, LTTextLine
-import pandas as pd
-import os
-import re
-
-
-def extract_pdf_features(pdf_path):
-    rows = []
-    for page_num, page_layout in enumerate(extract_pages(pdf_path), start=1):
-        last_y1 = None  # for line spacing
-
-        for element in page_layout:
-            if isinstance(element, LTTextContainer):
-                for text_line in element:
-                    if isinstance(text_line, LTTextLine):
-                        line_text = text_line.get_text().strip()
-                        if not line_text:
-                            continue
-    
-                        font_sizes = []
-                        fonts = []
-                        x0s, x1s, y0s, y1s = [], [], [], []
-
-                        for char in text_line:
-                            if isinstance(char, LTChar):
-                                font_sizes.append(char.size)
-                                fonts.append(char.fontname)
-                                x0s.append(char.x0)
-                                x1s.append(char.x1)
-                                y0s.append(char.y0)
-                                y1s.append(char.y1)
-
-                        if not font_sizes:
-                            continue
-
-                        avg_font_size = sum(font_sizes) / len(font_sizes)
-                        font_name = max(set(fonts), key=fonts.count) if fonts else ""
-                        is_bold = "Bold" in font_name or "bold" in font_name
-                        is_italic = "Italic" in font_name or "Oblique" in font_name
-
-                        x0 = min(x0s) if x0s else None
-                        x1 = max(x1s) if x1s else None
-                        y0 = min(y0s) if y0s else None
-                        y1 = max(y1s) if y1s else None
-                        y_center = (y0 + y1) / 2 if y0 and y1 else None
-
-                        # === Derived Features ===
-                        alignment = "left"
-                        if x0 > 200 and x1 < 400:
-                            alignment = "center"
-                        elif x0 > 400:
-                            alignment = "right"
-
-                        line_spacing = None
-                        if last_y1 is not None and y1 is not None:
-                            line_spacing = abs(last_y1 - y1)
-                        last_y1 = y1
-
-                        is_uppercase = line_text.isupper()
-                        num_words = len(line_text.split())
-                        text_length = len(line_text)
-                        contains_colon_or_dot = (":" in line_text or "." in line_text)
-                        is_numbered_heading = bool(re.match(r"^\d+(\.\d+)*\s", line_text))
-                        has_bullets_or_dashes = bool(re.match(r"^\s*[\u2022\u2023\u25E6\-–\*]+\s", line_text))
-
-                        rows.append({
-                            "text": line_text,
-                            "font_size": avg_font_size,
-                            "font_name": font_name,
-                            "is_bold": int(is_bold),
-                            "is_italic": int(is_italic),
-                            "x0": x0,
-                            "x1": x1,
-                            "y0": y0,
-                            "y1": y1,
-                            "y_pos": y_center,
-                            "text_alignment": alignment,
-                            "line_spacing": line_spacing,
-                            "page": page_num,
-                            "is_uppercase": int(is_uppercase),
-                            "num_words": num_words,
-                            "text_length": text_length,
-                            "contains_colon_or_dot": int(contains_colon_or_dot),
-                            "is_numbered_heading": int(is_numbered_heading),
-                            "has_bullets_or_dashes": int(has_bullets_or_dashes),
-                        })
-    return rows
-
-
-def process_pdfs(pdf_folder, output_csv):
-    all_rows = []
-    for filename in os.listdir(pdf_folder):
-        if filename.endswith(".pdf"):
-            pdf_path = os.path.join(pdf_folder, filename)
-            print(f"Processing: {filename}")
-            rows = extract_pdf_features(pdf_path)
-            for row in rows:
-                row["pdf_file"] = filename
-            all_rows.extend(rows)
-
-    df = pd.DataFrame(all_rows)
-    df.to_csv(output_csv, index=False)
-    print(f"\n Done! Extracted features saved to: {output_csv}")
-
-
-
-# === CONFIG ===
-PDF_FOLDER = "app/INPUT"  # Folder containing your PDFs
-
-OUTPUT_CSV = "combined_unlabeled.csv"  # Output path
-
-if __name__ == "__main__":
-    process_pdfs(PDF_FOLDER, OUTPUT_CSV)
\ No newline at end of file
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer, LTChar, LTTextLine
+from pdfminer.pdfpage import PDFPage
+from pdfminer.fontmetrics import FONT_METRICS
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter, deque
+from itertools import islice
+from feature_sink import open_sink, FEATURE_DTYPES, FEATURE_SCHEMA_VERSION
+from feature_cache import FeatureCache
+from functools import partial
+from instrumentation import (stage, count, active_report, start_run, finish_run,
+                             add_report_arguments, start_run_from_args)
+import numpy as np
+import pandas as pd
+import argparse
+import os
+import re
+
+BACKENDS = ("pdfminer", "pymupdf")
+
+# Raw per-line attributes collected by the backends
+LINE_FIELDS = ["text", "font_size", "font_name", "x0", "x1", "y0", "y1", "page", "page_width", "page_height"]
+
+# The original alignment thresholds (200/400 pt) were tuned on A4 pages;
+# they are scaled by page_width / A4_WIDTH so other page sizes line up.
+A4_WIDTH = 595.0
+
+FEATURE_COLUMNS = [col for col in FEATURE_DTYPES if col != "pdf_file"]
+
+
+def new_lines():
+    return {field: [] for field in LINE_FIELDS}
+
+
+def derive_features(lines):
+    """Turn the raw line columns of one document into the feature frame.
+
+    Every derived column is computed in one vectorized pass instead of per line.
+    """
+    df = pd.DataFrame(lines, columns=LINE_FIELDS)
+    text = df["text"].astype(str)
+    font_name = df["font_name"].astype(str)
+    x0, x1, y0, y1 = df["x0"], df["x1"], df["y0"], df["y1"]
+
+    df["is_bold"] = font_name.str.contains("Bold|bold", regex=True)
+    df["is_italic"] = font_name.str.contains("Italic|Oblique", regex=True)
+    df["y_pos"] = ((y0 + y1) / 2).where((y0 != 0) & (y1 != 0))
+
+    # === Derived Features ===
+    scale = df["page_width"] / A4_WIDTH
+    df["text_alignment"] = np.select(
+        [(x0 > 200 * scale) & (x1 < 400 * scale), x0 > 400 * scale], ["center", "right"], default="left"
+    )
+    # Spacing to the previous line on the same page (NaN for the first line)
+    df["line_spacing"] = (df.groupby("page")["y1"].shift() - y1).abs()
+
+    df["is_uppercase"] = text.str.isupper()
+    df["num_words"] = text.str.split().str.len()
+    df["text_length"] = text.str.len()
+    df["contains_colon_or_dot"] = text.str.contains(r"[:.]", regex=True)
+    df["is_numbered_heading"] = text.str.match(r"^\d+(\.\d+)*\s")
+    df["has_bullets_or_dashes"] = text.str.match("^\\s*[\u2022\u2023\u25E6\\-–*]+\\s")
+
+    # === Page Context ===
+    df["gap_above"], df["gap_below"] = page_gaps(df["page"].to_numpy(), y0.to_numpy(), y1.to_numpy(),
+                                                 df["page_height"].to_numpy())
+    df = add_document_features(df)
+
+    return df[FEATURE_COLUMNS].astype({col: FEATURE_DTYPES[col] for col in FEATURE_COLUMNS})
+
+
+def page_gaps(page, y0, y1, page_height):
+    """Vertical whitespace to the line above and below on the same page.
+
+    One sort by (page, top edge descending) puts every page's lines in
+    top-to-bottom order; a single sweep over neighbours in that order gives
+    both gaps. The first/last line of a page measures to the page edge
+    instead, so the columns never hold NaN (SMOTE cannot handle it).
+    """
+    gap_above = (page_height - y1).astype(np.float64)
+    gap_below = y0.astype(np.float64)
+    if len(page) < 2:
+        return gap_above, gap_below
+
+    order = np.lexsort((-y1, page))
+    top, bottom = y1[order], y0[order]
+    same_page = page[order][1:] == page[order][:-1]  # sorted line i and i+1 are on one page
+    gap = bottom[:-1] - top[1:]  # bottom of the upper line to the top of the lower one
+
+    gap_above[order[1:]] = np.where(same_page, gap, gap_above[order[1:]])
+    gap_below[order[:-1]] = np.where(same_page, gap, gap_below[order[:-1]])
+    return gap_above, gap_below
+
+
+def add_document_features(df):
+    """Font-size context over a whole document: body size, ratio, rank and z-score.
+
+    The body size is the most common size weighted by characters, so short
+    headings never win over running text. Page-range tasks call this again
+    on the merged frame, so the statistics always cover the full document.
+    """
+    # Start from the stored float32 sizes, so merged page ranges give identical results
+    font_size = df["font_size"].astype(np.float32).astype(np.float64)
+    sizes = font_size.round(1)
+    chars_per_size = df["text_length"].groupby(sizes).sum()
+    body_size = chars_per_size.idxmax() if len(chars_per_size) else np.nan
+    std = font_size.std(ddof=0)
+
+    df["body_font_size"] = body_size
+    df["font_size_ratio"] = font_size / body_size
+    df["font_size_rank"] = sizes.rank(method="dense", ascending=False).fillna(0)
+    df["font_size_zscore"] = (font_size - font_size.mean()) / std if std > 0 else 0.0
+    return df
+
+
+def _derive_and_count(lines, doc, num_pages):
+    with stage("feature_derivation", doc):
+        df = derive_features(lines)
+    count(doc, pages=num_pages, lines=len(df))
+    return df
+
+
+def extract_pdf_features(pdf_path, page_numbers=None, backend="pdfminer"):
+    # page_numbers: optional zero-based page indexes to restrict extraction to
+    if backend == "pymupdf":
+        return extract_pdf_features_pymupdf(pdf_path, page_numbers)
+    if backend != "pdfminer":
+        raise ValueError(f"Unknown extraction backend: {backend}")
+
+    if page_numbers is None:
+        pages = enumerate(extract_pages(pdf_path), start=1)
+    else:
+        page_numbers = sorted(page_numbers)
+        pages = zip((p + 1 for p in page_numbers), extract_pages(pdf_path, page_numbers=page_numbers))
+
+    doc = os.path.basename(pdf_path)
+    lines = new_lines()
+    num_pages = 0
+    with stage("pdf_layout", doc):  # pdfminer lays pages out lazily, inside this loop
+        for page_num, page_layout in pages:
+            num_pages += 1
+            for element in page_layout:
+                if isinstance(element, LTTextContainer):
+                    for text_line in element:
+                        if isinstance(text_line, LTTextLine):
+                            line_text = text_line.get_text().strip()
+                            if not line_text:
+                                continue
+
+                            chars = [char for char in text_line if isinstance(char, LTChar)]
+                            if not chars:
+                                continue
+
+                            lines["text"].append(line_text)
+                            lines["font_size"].append(sum(char.size for char in chars) / len(chars))
+                            lines["font_name"].append(Counter(char.fontname for char in chars).most_common(1)[0][0])
+                            lines["x0"].append(min(char.x0 for char in chars))
+                            lines["x1"].append(max(char.x1 for char in chars))
+                            lines["y0"].append(min(char.y0 for char in chars))
+                            lines["y1"].append(max(char.y1 for char in chars))
+                            lines["page"].append(page_num)
+                            lines["page_width"].append(page_layout.width)
+                            lines["page_height"].append(page_layout.height)
+    return _derive_and_count(lines, doc, num_pages)
+
+
+def _pdf_number(doc, xref, key):
+    kind, value = doc.xref_get_key(xref, key)
+    return float(value) if kind in ("int", "float") else None
+
+
+def _font_descent(doc, xref, basefont):
+    """Descent (per unit of font size) that pdfminer uses for a font: its
+    FontDescriptor /Descent, else the AFM value of a standard-14 font."""
+    kind, value = doc.xref_get_key(xref, "DescendantFonts")  # Type0: the descriptor sits on the CID font
+    if kind == "array":
+        match = re.search(r"(\d+) 0 R", value)
+        if match:
+            xref = int(match.group(1))
+    elif kind == "xref":
+        xref = int(value.split()[0])
+    kind, value = doc.xref_get_key(xref, "FontDescriptor")
+    if kind == "xref":
+        descent = _pdf_number(doc, int(value.split()[0]), "Descent")
+        if descent is not None:
+            return descent / 1000
+    if basefont in FONT_METRICS:
+        return FONT_METRICS[basefont][0].get("Descent", 0) / 1000
+    return None
+
+
+def page_font_descents(doc, page, cache):
+    """{span font name: descent} for the fonts of a page; cache is keyed by font xref."""
+    descents = {}
+    for xref, _, _, basefont, _, _ in page.get_fonts():
+        if xref not in cache:
+            cache[xref] = _font_descent(doc, xref, basefont)
+        if cache[xref] is not None:
+            descents[basefont.split("+", 1)[-1]] = cache[xref]  # spans drop the subset prefix
+    return descents
+
+
+def span_extent(span, page_height, descents):
+    """(y0, y1) of a span the way pdfminer boxes chars: baseline + descent, one font size tall.
+
+    PyMuPDF's span bbox uses the ascender/descender of the font program
+    instead, which puts the top about 0.37 * size higher; pdfminer takes the
+    descent from the PDF's font descriptor (or its AFM metrics).
+    """
+    size, baseline = span["size"], span["origin"][1]
+    # Glyphs shifted with a text rise (sub/superscripts) stretch the span bbox past the
+    # baseline's extent; PyMuPDF stretches ascender/descender to span at least one font size
+    # (0.01 pt of slack absorbs float noise in the bbox)
+    height = min(1.0, span["ascender"] - span["descender"]) if span["ascender"] > span["descender"] else 1.0
+    lowered = max(0.0, span["bbox"][3] - (baseline - span["descender"] / height * size) - 0.01)
+    raised = max(0.0, (baseline - span["ascender"] / height * size) - span["bbox"][1] - 0.01)
+    descent = descents.get(span["font"], span["descender"])
+    y0 = page_height - baseline + descent * size
+    return y0 - lowered, y0 + size + raised
+
+
+def extract_pdf_features_pymupdf(pdf_path, page_numbers=None):
+    """Same features as extract_pdf_features, built from PyMuPDF spans instead of pdfminer chars.
+
+    Span sizes are weighted by character count and the font is the one covering
+    most characters, matching the per-char averages of the pdfminer backend.
+    Coordinates are flipped to pdfminer's bottom-left origin, and the vertical
+    extent follows pdfminer's char boxes (see span_extent).
+    """
+    import fitz  # PyMuPDF, only needed for this backend
+
+    lines = new_lines()
+    font_cache = {}
+    with stage("pdf_layout", os.path.basename(pdf_path)), fitz.open(pdf_path) as doc:
+        if page_numbers is None:
+            indexes = range(doc.page_count)
+        else:
+            indexes = [i for i in sorted(page_numbers) if i < doc.page_count]
+        for index in indexes:
+            page = doc[index]
+            page_height = page.rect.height
+            page_width = page.rect.width
+            descents = page_font_descents(doc, page, font_cache)
+
+            for block in page.get_text("dict")["blocks"]:
+                if block.get("type") != 0:  # skip image blocks
+                    continue
+                for line in block["lines"]:
+                    spans = [span for span in line["spans"] if span["text"]]
+                    line_text = "".join(span["text"] for span in spans).strip()
+                    if not line_text:
+                        continue
+
+                    size_total = 0.0
+                    char_count = 0
+                    font_counts = Counter()
+                    for span in spans:
+                        n = len(span["text"])
+                        size_total += span["size"] * n
+                        char_count += n
+                        font_counts[span["font"]] += n
+
+                    lines["text"].append(line_text)
+                    lines["font_size"].append(size_total / char_count)
+                    lines["font_name"].append(font_counts.most_common(1)[0][0])
+                    lines["x0"].append(min(span["bbox"][0] for span in spans))
+                    lines["x1"].append(max(span["bbox"][2] for span in spans))
+                    extents = [span_extent(span, page_height, descents) for span in spans]
+                    lines["y0"].append(min(y0 for y0, _ in extents))
+                    lines["y1"].append(max(y1 for _, y1 in extents))
+                    lines["page"].append(index + 1)
+                    lines["page_width"].append(page_width)
+                    lines["page_height"].append(page_height)
+    return _derive_and_count(lines, os.path.basename(pdf_path), len(indexes))
+
+
+def count_pdf_pages(pdf_path, backend="pdfminer"):
+    if backend == "pymupdf":
+        import fitz
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    with open(pdf_path, "rb") as fp:
+        return sum(1 for _ in PDFPage.get_pages(fp))
+
+
+def build_tasks(pdf_folder, filenames, pages_per_task=None, backend="pdfminer"):
+    # One task per PDF, or per page range when pages_per_task is set.
+    tasks = []
+    for filename in filenames:
+        pdf_path = os.path.join(pdf_folder, filename)
+
+        num_pages = None
+        if pages_per_task:
+            try:
+                num_pages = count_pdf_pages(pdf_path, backend)
+            except Exception:
+                num_pages = None  # let the worker report the error
+
+        if not num_pages or num_pages <= pages_per_task:
+            tasks.append((filename, pdf_path, None, backend))
+        else:
+            for start in range(0, num_pages, pages_per_task):
+                page_range = list(range(start, min(start + pages_per_task, num_pages)))
+                tasks.append((filename, pdf_path, page_range, backend))
+    return tasks
+
+
+def _run_task(task):
+    filename, pdf_path, page_numbers, backend = task
+    try:
+        return filename, extract_pdf_features(pdf_path, page_numbers, backend), None
+    except Exception as e:
+        return filename, None, f"{type(e).__name__}: {e}"
+
+
+def _run_task_reported(task, trace_memory=False):
+    # Worker processes record into their own report, which the parent merges
+    start_run("worker", trace_memory)
+    result = _run_task(task)
+    return result, finish_run(summary=False)
+
+
+def _bounded_map(executor, fn, tasks, window):
+    """Like executor.map, but with at most window tasks submitted and not yet yielded.
+
+    Results still come back in task order, so a slow early PDF holds back at
+    most window finished frames instead of every later one in the corpus.
+    """
+    tasks = iter(tasks)
+    futures = deque(executor.submit(fn, task) for task in islice(tasks, window))
+    try:
+        while futures:
+            result = futures.popleft().result()
+            for task in islice(tasks, 1):
+                futures.append(executor.submit(fn, task))
+            yield result
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _merge_reports(report, results):
+    for result, data in results:
+        report.merge(data)
+        yield result
+
+
+def _group_results(results):
+    # Merge consecutive page-range results back into one entry per PDF
+    current, current_frames, current_error = None, [], None
+    for filename, df, error in results:
+        if filename != current:
+            if current is not None:
+                yield _merge_frames(current, current_frames, current_error)
+            current, current_frames, current_error = filename, [], None
+        if error and not current_error:
+            current_error = error
+        if df is not None:
+            current_frames.append(df)
+    if current is not None:
+        yield _merge_frames(current, current_frames, current_error)
+
+
+def _merge_frames(filename, frames, error):
+    if error:
+        return filename, None, error
+    if len(frames) == 1:
+        return filename, frames[0], None
+    # Document-wide statistics were computed per page range; redo them on the whole PDF
+    df = add_document_features(pd.concat(frames, ignore_index=True))
+    return filename, df.astype({col: FEATURE_DTYPES[col] for col in FEATURE_COLUMNS}), None
+
+
+def _cache_key(cache, pdf_path):
+    try:
+        return cache.key_for(pdf_path)
+    except OSError:
+        return None
+
+
+def iter_pdf_rows(pdf_folder, workers=1, pages_per_task=None, cache=None, backend="pdfminer"):
+    """Yield (filename, features, error) per PDF, in sorted filename order."""
+    filenames = sorted(f for f in os.listdir(pdf_folder) if f.endswith(".pdf"))
+
+    keys = {}
+    if cache:
+        keys = {f: _cache_key(cache, os.path.join(pdf_folder, f)) for f in filenames}
+    to_extract = [f for f in filenames if not (keys.get(f) and cache.contains(keys[f]))]
+    if cache:
+        cache.record_miss(len(to_extract))
+
+    tasks = build_tasks(pdf_folder, to_extract, pages_per_task, backend)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and tasks else None
+    report = active_report()
+    window = 2 * workers  # tasks in flight; bounds the finished frames waiting on a slow PDF
+    if executor and report:
+        mapped = _merge_reports(report, _bounded_map(
+            executor, partial(_run_task_reported, trace_memory=report.trace_memory), tasks, window))
+    else:
+        mapped = _bounded_map(executor, _run_task, tasks, window) if executor else map(_run_task, tasks)
+    results = _group_results(mapped)
+
+    try:
+        pending = set(to_extract)
+        for filename in filenames:
+            print(f"Processing: {filename}")
+            if report:
+                count(filename, pdf_bytes=os.path.getsize(os.path.join(pdf_folder, filename)))
+            if filename in pending:
+                _, df, error = next(results)
+                if cache and keys[filename] and not error:
+                    cache.store(keys[filename], df)
+                yield filename, df, error
+                continue
+
+            with stage("cache_load", filename):
+                df = cache.load(keys[filename])
+            if df is None:  # entry vanished or is unreadable
+                pdf_path = os.path.join(pdf_folder, filename)
+                _, df, error = _run_task((filename, pdf_path, None, backend))
+                if not error:
+                    cache.store(keys[filename], df)
+                yield filename, df, error
+                continue
+            yield filename, df, None
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def output_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def open_cache(cache_dir, backend="pdfminer", cache_max_mb=1024):
+    if not cache_dir:
+        return None
+    return FeatureCache(cache_dir, f"{FEATURE_SCHEMA_VERSION}-{backend}", cache_max_mb * (1 << 20))
+
+
+def process_pdfs(pdf_folder, output_csv, workers=1, pages_per_task=None, fmt=None, batch_size=50000,
+                 cache_dir=None, cache_max_mb=1024, backend="pdfminer"):
+    # Rows are flushed to disk per PDF (or every batch_size rows) so memory
+    # stays flat regardless of corpus size.
+    cache = open_cache(cache_dir, backend, cache_max_mb)
+    sink = open_sink(output_csv, fmt, batch_size)
+    failed = []
+    try:
+        for filename, df, error in iter_pdf_rows(pdf_folder, workers, pages_per_task, cache, backend):
+            if error:
+                print(f" Skipping {filename}: {error}")
+                failed.append(filename)
+                continue
+            with stage("output_write", filename):
+                sink.write(df.assign(pdf_file=filename))
+                sink.end_pdf(filename)
+    finally:
+        with stage("output_write"):
+            sink.close()
+    count(bytes_written=output_size(output_csv))
+
+    print(f"\n Done! {sink.rows_written} rows of extracted features saved to: {output_csv}")
+    if failed:
+        print(f" {len(failed)} PDF(s) failed: {', '.join(failed)}")
+    if cache:
+        cache.close()
+
+
+
+# === CONFIG ===
+PDF_FOLDER = "app/INPUT"  # Folder containing your PDFs
+
+OUTPUT_CSV = "combined_unlabeled.csv"  # Output path
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Extract line-level features from a folder of PDFs")
+    parser.add_argument("--input-dir", "-i", default=PDF_FOLDER, help="Folder containing the PDFs")
+    parser.add_argument("--output", "-o", default=OUTPUT_CSV, help="Output CSV path")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="Number of worker processes (default: 1, no pool)")
+    parser.add_argument("--pages-per-task", type=int, default=None,
+                        help="Split PDFs longer than this many pages into page-range tasks")
+    parser.add_argument("--format", choices=["csv", "feather", "parquet"], default=None,
+                        help="Output format (default: by extension: .csv, .feather/.arrow, "
+                             "anything else a partitioned parquet folder)")
+    parser.add_argument("--batch-size", type=int, default=50000,
+                        help="Flush to disk after this many buffered rows")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Reuse features of unchanged PDFs from this cache directory")
+    parser.add_argument("--cache-max-mb", type=int, default=1024,
+                        help="Evict least recently used cache entries above this size")
+    parser.add_argument("--backend", choices=BACKENDS, default="pdfminer",
+                        help="PDF text extraction backend (pymupdf is much faster)")
+    add_report_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    report = start_run_from_args("extract_features", args)
+    process_pdfs(args.input_dir, args.output, args.workers, args.pages_per_task,
+                 args.format, args.batch_size, args.cache_dir, args.cache_max_mb,
+                 args.backend)
+    if report:
+        finish_run(args.report)
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import pandas as pd
+from feature_sink import load_features, save_features
+
+ENTRY_EXTENSION = ".feather"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """On-disk cache of extracted feature frames, keyed by PDF content hash + schema version.
+
+    Entries are Feather files written with save_features. The pandas and
+    pyarrow versions are part of the key, and an entry that fails to load for
+    any reason counts as a miss, so the PDF is simply extracted again.
+    Entries are evicted least-recently-used first (by mtime, refreshed on every
+    hit) when close() finds the cache above max_bytes.
+    """
+
+    def __init__(self, cache_dir, schema_version, max_bytes=1 << 30):
+        self.cache_dir = cache_dir
+        self.schema_version = schema_version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, pdf_path):
+        import pyarrow
+
+        return f"{file_sha256(pdf_path)}-v{self.schema_version}-pd{pd.__version__}-pa{pyarrow.__version__}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}{ENTRY_EXTENSION}")
+
+    def contains(self, key):
+        return os.path.exists(self._path(key))
+
+    def load(self, key):
+        path = self._path(key)
+        try:
+            df = load_features(path)
+        except Exception:  # missing, truncated or written by an incompatible version
+            self.misses += 1
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return df
+
+    def store(self, key, df):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp{ENTRY_EXTENSION}"  # save_features picks the format by extension
+        save_features(df, tmp_path)
+        os.replace(tmp_path, path)
+        self.stores += 1
+
+    def record_miss(self, count=1):
+        self.misses += count
+
+    def evict(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(ENTRY_EXTENSION) and ".tmp" not in name:
+                    path = os.path.join(root, name)
+                    st = os.stat(path)
+                    entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self.evictions += 1
+        return total
+
+    def close(self):
+        size = self.evict()
+        print(f" Feature cache: {self.hits} hits, {self.misses} misses, "
+              f"{self.evictions} evicted, {size / (1 << 20):.1f} MB on disk")
@@ -0,0 +1,261 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Bump whenever the extracted columns or their meaning change, so cached
+# features from older runs are not reused. Version 3 added the page-context
+# columns (page_width ... font_size_zscore), version 4 the compact dtypes.
+FEATURE_SCHEMA_VERSION = 4
+
+# === Feature Columns (in output order) and their dtypes ===
+# Repeated strings are categoricals, flags int8, coordinates and sizes
+# float32 (what XGBoost computes in anyway) and page numbers uint16.
+FEATURE_DTYPES = {
+    "text": "str",
+    "font_size": "float32",
+    "font_name": "category",
+    "is_bold": "int8",
+    "is_italic": "int8",
+    "x0": "float32",
+    "x1": "float32",
+    "y0": "float32",
+    "y1": "float32",
+    "y_pos": "float32",
+    "text_alignment": "category",
+    "line_spacing": "float32",
+    "page": "uint16",
+    "is_uppercase": "int8",
+    "num_words": "int32",
+    "text_length": "int32",
+    "contains_colon_or_dot": "int8",
+    "is_numbered_heading": "int8",
+    "has_bullets_or_dashes": "int8",
+    "page_width": "float32",
+    "gap_above": "float32",
+    "gap_below": "float32",
+    "body_font_size": "float32",
+    "font_size_ratio": "float32",
+    "font_size_rank": "uint16",
+    "font_size_zscore": "float32",
+    "pdf_file": "category",
+}
+
+# Training data may be SMOTE output, which interpolates every numeric column,
+# so there the integer columns load as float32 instead of being truncated.
+TRAINING_DTYPES = {col: "float32" if dtype.startswith(("int", "uint")) else dtype
+                   for col, dtype in FEATURE_DTYPES.items()}
+
+FEATHER_EXTENSIONS = (".feather", ".arrow")
+
+
+def apply_schema(df, dtypes=FEATURE_DTYPES):
+    """Cast the feature columns present in df to dtypes; other columns are left alone.
+
+    Works on frames read from any format, including old CSVs with True/False
+    flags and SMOTE output with fractional flags (truncated, like astype(int)).
+    Pass TRAINING_DTYPES for SMOTE output to keep every interpolated value instead.
+    """
+    return df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+
+
+def frames_to_batch(frames):
+    if not frames:
+        return pd.DataFrame(columns=list(FEATURE_DTYPES)).astype(FEATURE_DTYPES)
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return df[list(FEATURE_DTYPES)].astype(FEATURE_DTYPES)
+
+
+def to_arrow(df, categories=None):
+    """pyarrow Table of df, with NaN kept as NaN (not null) so numeric columns load zero-copy.
+
+    Categorical columns become dictionary<int32, string> arrays; with
+    categories (column -> list of values), the dictionary is that list, so
+    successive batches only ever append to it.
+    """
+    import pyarrow as pa
+
+    arrays, fields = [], []
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            if categories is not None:
+                series = series.cat.set_categories(categories[col])
+            codes = series.cat.codes.to_numpy().astype(np.int32)
+            array = pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0), pa.array(list(series.cat.categories), type=pa.string()))
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            array = pa.array(series.astype(object).to_numpy(), type=pa.string(), from_pandas=True)
+        else:
+            array = pa.array(series.to_numpy())
+        arrays.append(array)
+        fields.append(pa.field(col, array.type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def load_features(path, columns=None, dtypes=FEATURE_DTYPES):
+    """Read a feature file (CSV, Feather/Arrow or Parquet file/folder) into the compact dtypes.
+
+    Feather files are memory-mapped; numeric columns are not parsed or
+    decoded, just viewed (or concatenated, when the file holds several
+    record batches).
+    """
+    if path.endswith(FEATHER_EXTENSIONS):
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        df = table.to_pandas(split_blocks=True)
+    elif path.endswith(".csv"):
+        df = pd.read_csv(path, usecols=columns)
+    else:
+        df = pd.read_parquet(path, columns=columns)
+    return apply_schema(df, dtypes)
+
+
+def save_features(df, path, dtypes=FEATURE_DTYPES):
+    """Write a feature frame in the compact dtypes as CSV, Feather/Arrow or Parquet, by file extension."""
+    df = apply_schema(df, dtypes)
+    if path.endswith(FEATHER_EXTENSIONS):
+        import pyarrow as pa
+
+        table = to_arrow(df)
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    elif path.endswith(".csv"):
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+
+
+class FeatureSink:
+    """Buffers per-PDF feature frames and writes them out in batches."""
+
+    def __init__(self, batch_size=50000):
+        self.batch_size = batch_size
+        self.buffer = []
+        self.buffered_rows = 0
+        self.rows_written = 0
+
+    def write(self, df):
+        self.buffer.append(df)
+        self.buffered_rows += len(df)
+        if self.buffered_rows >= self.batch_size:
+            self.flush()
+
+    def end_pdf(self, filename):
+        self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        self._write_batch(frames_to_batch(self.buffer))
+        self.rows_written += self.buffered_rows
+        self.buffer = []
+        self.buffered_rows = 0
+
+    def _write_batch(self, df):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+
+class CsvFeatureSink(FeatureSink):
+    """Appends feature rows to a single CSV, writing the header once."""
+
+    def __init__(self, output_csv, batch_size=50000):
+        super().__init__(batch_size)
+        self.output_csv = output_csv
+        self._header_written = False
+        self._file = open(output_csv, "w", encoding="utf-8", newline="")
+
+    def _write_batch(self, df):
+        df.to_csv(self._file, index=False, header=not self._header_written)
+        self._file.flush()
+        self._header_written = True
+
+    def close(self):
+        self.flush()
+        if not self._header_written:
+            self._write_batch(frames_to_batch([]))
+        self._file.close()
+
+
+class ParquetFeatureSink(FeatureSink):
+    """Writes one Parquet partition per PDF: <root>/pdf_file=<name>/part-NNNNN.parquet"""
+
+    def __init__(self, output_dir, batch_size=50000):
+        import pyarrow  # noqa: F401  (fail early if pyarrow is missing)
+
+        super().__init__(batch_size)
+        self.output_dir = output_dir
+        self._parts = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _write_batch(self, df):
+        for pdf_file, group in df.groupby("pdf_file", sort=False):
+            part = self._parts.get(pdf_file, 0)
+            self._parts[pdf_file] = part + 1
+
+            partition_dir = os.path.join(self.output_dir, f"pdf_file={pdf_file}")
+            os.makedirs(partition_dir, exist_ok=True)
+            group.drop(columns="pdf_file").to_parquet(
+                os.path.join(partition_dir, f"part-{part:05d}.parquet"), index=False
+            )
+
+
+class FeatherFeatureSink(FeatureSink):
+    """Appends record batches to one Arrow IPC (Feather v2) file, uncompressed so it can be memory-mapped.
+
+    An IPC file allows a single dictionary per column, extended by deltas,
+    so each categorical column keeps one growing list of categories across
+    batches.
+    """
+
+    def __init__(self, output_path, batch_size=50000):
+        import pyarrow  # noqa: F401  (fail early if pyarrow is missing)
+
+        super().__init__(batch_size)
+        self.output_path = output_path
+        self._writer = None
+        self._sink = None
+        self._categories = {col: [] for col, dtype in FEATURE_DTYPES.items() if dtype == "category"}
+
+    def _write_batch(self, df):
+        import pyarrow as pa
+
+        for col, known in self._categories.items():
+            seen = set(known)
+            known.extend(value for value in df[col].cat.categories if value not in seen)
+        table = to_arrow(df, self._categories)
+        if self._writer is None:
+            self._sink = pa.OSFile(self.output_path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, table.schema,
+                                           options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+        self._writer.write_table(table)
+
+    def close(self):
+        self.flush()
+        if self._writer is None:
+            self._write_batch(frames_to_batch([]))
+        self._writer.close()
+        self._sink.close()
+
+
+def open_sink(output, fmt=None, batch_size=50000):
+    if fmt is None:
+        if output.endswith(".csv"):
+            fmt = "csv"
+        elif output.endswith(FEATHER_EXTENSIONS):
+            fmt = "feather"
+        else:
+            fmt = "parquet"
+    if fmt == "csv":
+        return CsvFeatureSink(output, batch_size)
+    if fmt == "feather":
+        return FeatherFeatureSink(output, batch_size)
+    if fmt == "parquet":
+        return ParquetFeatureSink(output, batch_size)
+    raise ValueError(f"Unknown output format: {fmt}")
@@ -0,0 +1,243 @@
+# Vendored copy: this module exists twice, as ADOBE1A1/ADOBE1A/app/instrumentation.py
+# and ADOBE1B/ADOBE1B/instrumentation.py, because each project is built from its
+# own Docker context. The two files must stay identical; change both together.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# The report stages and counters are recorded into. None means instrumentation
+# is off and stage()/count()/record() below cost next to nothing.
+_ACTIVE = None
+
+
+class RunReport:
+    """Wall time per stage, counters (pages, lines, rows, bytes) and optional memory peaks.
+
+    Everything is also broken down per document when a doc name is given.
+    With trace_memory, tracemalloc runs for the whole run and each stage
+    records the peak Python allocation seen while it was open. With profile,
+    top-level stages of the main thread run under cProfile; profile="hottest"
+    keeps one profile per stage and dumps the one with the most wall time.
+    """
+
+    def __init__(self, name, trace_memory=False, profile=None, meta=None):
+        self.name = name
+        self.meta = dict(meta or {})  # run settings and derived figures, copied into the report
+        self.started = datetime.now()
+        self.start = time.perf_counter()
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.stages = {}
+        self.counters = {}
+        self.documents = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles = {}
+
+        if trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _doc(self, doc):
+        return self.documents.setdefault(doc, {"stages": {}, "counters": {}})
+
+    def record(self, name, seconds, doc=None, calls=1, peak_bytes=None):
+        """Add a timing measured elsewhere (e.g. in another thread or process)."""
+        with self._lock:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += seconds
+            entry["calls"] += calls
+            if peak_bytes is not None:
+                entry["peak_bytes"] = max(entry.get("peak_bytes", 0), peak_bytes)
+            if doc is not None:
+                doc_stages = self._doc(doc)["stages"]
+                doc_stages[name] = doc_stages.get(name, 0.0) + seconds
+
+    def count(self, doc=None, **counters):
+        with self._lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+                if doc is not None:
+                    doc_counters = self._doc(doc)["counters"]
+                    doc_counters[key] = doc_counters.get(key, 0) + value
+
+    def _fold_peak(self, stack):
+        # tracemalloc keeps one process-wide peak: credit it to every open stage, then reset
+        import tracemalloc
+
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in stack:
+            frame["peak"] = max(frame["peak"], peak)
+        tracemalloc.reset_peak()
+
+    def _profiler_for(self, name, stack):
+        if not self.profile or stack or threading.current_thread() is not threading.main_thread():
+            return None
+        if self.profile != "hottest" and self.profile != name:
+            return None
+        import cProfile
+        return self._profiles.setdefault(name, cProfile.Profile())
+
+    @contextmanager
+    def stage(self, name, doc=None):
+        stack = self._stack()
+        if self.trace_memory:
+            self._fold_peak(stack)
+        profiler = self._profiler_for(name, stack)
+        frame = {"peak": 0}
+        stack.append(frame)
+        if profiler:
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler:
+                profiler.disable()
+            if self.trace_memory:
+                self._fold_peak(stack)
+            stack.pop()
+            self.record(name, seconds, doc, peak_bytes=frame["peak"] if self.trace_memory else None)
+
+    def merge(self, data):
+        """Fold in the to_dict() of a report recorded in a worker process."""
+        for name, entry in data["stages"].items():
+            self.record(name, entry["seconds"], calls=entry["calls"], peak_bytes=entry.get("peak_bytes"))
+        self.count(**data["counters"])
+        for doc, doc_data in data["documents"].items():
+            with self._lock:
+                target = self._doc(doc)
+                for key, seconds in doc_data["stages"].items():
+                    target["stages"][key] = target["stages"].get(key, 0.0) + seconds
+                for key, value in doc_data["counters"].items():
+                    target["counters"][key] = target["counters"].get(key, 0) + value
+
+    def to_dict(self):
+        stages = {}
+        for name, entry in self.stages.items():
+            stages[name] = {"seconds": round(entry["seconds"], 6), "calls": entry["calls"]}
+            if "peak_bytes" in entry:
+                stages[name]["peak_bytes"] = entry["peak_bytes"]
+        return {
+            "run": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self.start, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "meta": self.meta,
+            "stages": stages,
+            "counters": dict(self.counters),
+            "documents": {doc: {"stages": {k: round(v, 6) for k, v in data["stages"].items()},
+                                "counters": dict(data["counters"])}
+                          for doc, data in self.documents.items()},
+        }
+
+    def dump_profile(self, report_path):
+        if not self._profiles:
+            return None
+        stage = max(self._profiles, key=lambda name: self.stages.get(name, {}).get("seconds", 0.0))
+        path = f"{os.path.splitext(report_path)[0]}.{stage}.prof"
+        self._profiles[stage].dump_stats(path)
+        return stage, path
+
+    def save(self, path):
+        data = self.to_dict()
+        profiled = self.dump_profile(path)
+        if profiled:
+            data["profile"] = {"stage": profiled[0], "path": profiled[1]}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return data
+
+    def print_summary(self):
+        print(f" {self.name}: {time.perf_counter() - self.start:.3f}s wall")
+        for name, entry in sorted(self.stages.items(), key=lambda item: -item[1]["seconds"]):
+            peak = f"  peak {entry['peak_bytes'] / (1 << 20):8.1f} MB" if "peak_bytes" in entry else ""
+            print(f"   {name:<20} {entry['seconds']:9.3f}s  {entry['calls']:6d} calls{peak}")
+        if self.counters:
+            print("   " + ", ".join(f"{key}={value}" for key, value in sorted(self.counters.items())))
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    import sys
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def start_run(name, trace_memory=False, profile=None, meta=None):
+    global _ACTIVE
+    _ACTIVE = RunReport(name, trace_memory, profile, meta)
+    return _ACTIVE
+
+
+def active_report():
+    return _ACTIVE
+
+
+def finish_run(path=None, summary=True):
+    """Stop recording; print the summary and write the JSON report when a path is given."""
+    global _ACTIVE
+    report, _ACTIVE = _ACTIVE, None
+    if report is None:
+        return None
+    if path is None and report.profile:
+        path = f"{report.name}_report.json"  # the profile dump is written next to the report
+    if summary:
+        report.print_summary()
+    data = report.save(path) if path else report.to_dict()
+    if path:
+        print(f" Run report saved to: {path}")
+        if "profile" in data:
+            print(f" cProfile of stage '{data['profile']['stage']}' saved to: {data['profile']['path']}")
+    if report.trace_memory:
+        import tracemalloc
+        tracemalloc.stop()
+    return data
+
+
+@contextmanager
+def stage(name, doc=None):
+    if _ACTIVE is None:
+        yield
+        return
+    with _ACTIVE.stage(name, doc):
+        yield
+
+
+def count(doc=None, **counters):
+    if _ACTIVE is not None:
+        _ACTIVE.count(doc, **counters)
+
+
+def record(name, seconds, doc=None):
+    if _ACTIVE is not None:
+        _ACTIVE.record(name, seconds, doc)
+
+
+def add_report_arguments(parser):
+    parser.add_argument("--report", default=None,
+                        help="Write a JSON run report (per-stage timings, counters, per-document breakdown)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Record per-stage peak Python memory with tracemalloc (slower)")
+    parser.add_argument("--profile", nargs="?", const="hottest", default=None,
+                        help="Run stages under cProfile and dump the given stage, or the slowest one, "
+                             "next to the report")
+
+
+def start_run_from_args(name, args, force=False):
+    """Start a report if any of the add_report_arguments() flags were given (or force is set)."""
+    if force or args.report or args.trace_memory or args.profile:
+        return start_run(name, args.trace_memory, args.profile, {"args": vars(args)})
+    return None
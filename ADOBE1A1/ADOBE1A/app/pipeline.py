@@ -0,0 +1,119 @@
+import argparse
+import os
+from extract_features import iter_pdf_rows, open_cache, BACKENDS, PDF_FOLDER
+from feature_sink import CsvFeatureSink
+from predict_labels import load_model, predict_labels, MODEL_DIR
+from structure_jsonoutput import build_outline, write_outline
+from instrumentation import stage, count, add_report_arguments, start_run_from_args, finish_run
+
+# === CONFIG ===
+OUTPUT_DIR = "app/OUTPUT"  # Folder for the per-PDF JSON outlines
+
+
+class PredictionCsvWriter:
+    """Appends text/page/pdf_file/label rows in the PREDICTED_OUTPUT.csv layout."""
+
+    def __init__(self, output_csv):
+        self._file = open(output_csv, "w", encoding="utf-8", newline="")
+        self._header_written = False
+
+    def write(self, df):
+        df[["text", "page", "pdf_file", "label"]].to_csv(
+            self._file, index=False, header=not self._header_written
+        )
+        self._file.flush()
+        self._header_written = True
+
+    def close(self):
+        self._file.close()
+
+
+def run_pipeline(pdf_folder, output_dir, workers=1, pages_per_task=None, backend="pdfminer",
+                 cache_dir=None, cache_max_mb=1024, model_dir=MODEL_DIR, dump_csv_dir=None,
+                 native=False, nthread=None, compact=False):
+    """PDF -> features -> labels -> JSON outline, one PDF at a time, without CSV round-trips.
+
+    Each <stem>.json is written as soon as its PDF has been labelled. With
+    dump_csv_dir, the intermediate features and predictions are also written
+    as CSVs for debugging.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with stage("model_load"):
+        model, le = load_model(model_dir, native, nthread)
+    cache = open_cache(cache_dir, backend, cache_max_mb)
+
+    feature_sink = prediction_writer = None
+    if dump_csv_dir:
+        os.makedirs(dump_csv_dir, exist_ok=True)
+        feature_sink = CsvFeatureSink(os.path.join(dump_csv_dir, "combined_unlabeled.csv"))
+        prediction_writer = PredictionCsvWriter(os.path.join(dump_csv_dir, "PREDICTED_OUTPUT.csv"))
+
+    written, failed = 0, []
+    try:
+        for filename, df, error in iter_pdf_rows(pdf_folder, workers, pages_per_task, cache, backend):
+            if error:
+                print(f" Skipping {filename}: {error}")
+                failed.append(filename)
+                continue
+
+            df = df.assign(pdf_file=filename)
+            with stage("predict", filename):
+                df["label"] = predict_labels(df, model, le) if len(df) else []
+
+            with stage("outline_build", filename):
+                outline = build_outline(df, filename)
+            with stage("json_write", filename):
+                output_file = write_outline(output_dir, filename, outline, compact)
+            count(filename, rows=len(df), headings=len(outline["outline"]))
+            written += 1
+            print(f" Processed: {output_file.name}")
+
+            if feature_sink:
+                feature_sink.write(df)
+                feature_sink.end_pdf(filename)
+                prediction_writer.write(df)
+    finally:
+        if feature_sink:
+            feature_sink.close()
+            prediction_writer.close()
+
+    print(f"\n Done! {written} JSON outline(s) saved to: {output_dir}")
+    if failed:
+        print(f" {len(failed)} PDF(s) failed: {', '.join(failed)}")
+    if cache:
+        cache.close()
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Extract, classify and outline a folder of PDFs in one pass")
+    parser.add_argument("--input-dir", "-i", default=PDF_FOLDER, help="Folder containing the PDFs")
+    parser.add_argument("--output-dir", "-o", default=OUTPUT_DIR, help="Folder for the JSON outlines")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Folder with xgb_model.pkl and label_encoder.pkl")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="Number of worker processes (default: 1, no pool)")
+    parser.add_argument("--pages-per-task", type=int, default=None,
+                        help="Split PDFs longer than this many pages into page-range tasks")
+    parser.add_argument("--backend", choices=BACKENDS, default="pdfminer",
+                        help="PDF text extraction backend")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Reuse features of unchanged PDFs from this cache directory")
+    parser.add_argument("--cache-max-mb", type=int, default=1024,
+                        help="Evict least recently used cache entries above this size")
+    parser.add_argument("--dump-csv-dir", default=None,
+                        help="Also write intermediate features/predictions CSVs here (debugging)")
+    parser.add_argument("--native", action="store_true",
+                        help="Predict with the native XGBoost Booster (inplace_predict) fast path")
+    parser.add_argument("--nthread", type=int, default=None, help="XGBoost threads for --native")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of indent=2")
+    add_report_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    report = start_run_from_args("pipeline", args)
+    run_pipeline(args.input_dir, args.output_dir, args.workers, args.pages_per_task, args.backend,
+                 args.cache_dir, args.cache_max_mb, args.model_dir, args.dump_csv_dir,
+                 args.native, args.nthread, args.compact)
+    if report:
+        finish_run(args.report)
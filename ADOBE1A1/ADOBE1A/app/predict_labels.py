@@ -1,42 +1,143 @@
-import pandas as pd
-import joblib
-
-def run_prediction():
-    # === CONFIG ===
-    INPUT_CSV = "app/INPUT/input_unlabeled.csv"
-    OUTPUT_CSV = "app/PREDICTED_OUTPUT.csv"
-
-    # === Load Trained Model and LabelEncoder ===
-    model = joblib.load("app/model/xgb_model.pkl")
-    le = joblib.load("app/model/label_encoder.pkl")
-
-    # === Load Input Data ===
-    df = pd.read_csv(INPUT_CSV)
-
-    # === Define Features ===
-    features = [
-        "font_size", "is_bold", "is_italic", "x0", "x1", "y0", "y1", "y_pos",
-        "is_uppercase", "num_words", "text_length",
-        "contains_colon_or_dot", "is_numbered_heading", "has_bullets_or_dashes"
-    ]
-
-    # === Ensure Boolean Columns Are Integer (0/1) ===
-    bool_cols = [
-        "is_bold", "is_italic", "is_uppercase",
-        "contains_colon_or_dot", "is_numbered_heading", "has_bullets_or_dashes"
-    ]
-    df[bool_cols] = df[bool_cols].astype(int)
-
-    # === Run Model Prediction ===
-    X = df[features]
-    preds = model.predict(X)
-    df["label"] = le.inverse_transform(preds)
-
-    # === Save Predicted Output CSV ===
-    df[["text", "page", "pdf_file", "label"]].to_csv(OUTPUT_CSV, index=False)
-
-    print(f" Predictions saved to: {OUTPUT_CSV}")
-
-# Optional: Run directly for debugging
-if __name__ == "__main__":
-    run_prediction()
+import os
+import json
+import argparse
+import numpy as np
+import joblib
+from feature_sink import FEATURE_SCHEMA_VERSION, apply_schema, load_features
+from instrumentation import stage, count, add_report_arguments, start_run_from_args, finish_run
+
+# === Define Features ===
+FEATURES = [
+    "font_size", "is_bold", "is_italic", "x0", "x1", "y0", "y1", "y_pos",
+    "is_uppercase", "num_words", "text_length",
+    "contains_colon_or_dot", "is_numbered_heading", "has_bullets_or_dashes"
+]
+
+# Page/document context columns, extracted since feature schema version 3
+CONTEXT_FEATURES = [
+    "page_width", "gap_above", "gap_below",
+    "body_font_size", "font_size_ratio", "font_size_rank", "font_size_zscore"
+]
+
+BOOL_COLS = [
+    "is_bold", "is_italic", "is_uppercase",
+    "contains_colon_or_dot", "is_numbered_heading", "has_bullets_or_dashes"
+]
+
+MODEL_DIR = "app/model"
+
+
+NATIVE_MODEL_FILE = "xgb_model.ubj"
+SCHEMA_FILE = "feature_schema.json"  # feature schema version + feature list the model was trained on
+
+
+def load_model(model_dir=MODEL_DIR, native=False, nthread=None):
+    # native=True returns the raw xgboost.Booster for the inplace_predict fast
+    # path, read from the .ubj that train_xgboost_model.py writes next to the pickle.
+    le = joblib.load(f"{model_dir}/label_encoder.pkl")
+    pickle_path = f"{model_dir}/xgb_model.pkl"
+    if not native:
+        return joblib.load(pickle_path), le
+
+    import xgboost as xgb
+
+    native_path = os.path.join(model_dir, NATIVE_MODEL_FILE)
+    if os.path.exists(native_path) and os.path.getmtime(native_path) >= os.path.getmtime(pickle_path):
+        booster = xgb.Booster(model_file=native_path)
+    else:
+        # A pickle without a matching .ubj (e.g. copied in from an older training run):
+        # use its booster as is; nothing is written on the prediction path
+        print(f" {NATIVE_MODEL_FILE} is missing or older than xgb_model.pkl; using the pickled model")
+        booster = joblib.load(pickle_path).get_booster()
+    if nthread:
+        booster.set_param({"nthread": nthread})
+    return booster, le
+
+
+def model_features(model):
+    """Feature columns the model was trained on, in order (FEATURES for models without names)."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    return list(booster.feature_names or FEATURES)
+
+
+def check_features(df, features):
+    missing = [col for col in features if col not in df.columns]
+    if missing:
+        raise ValueError(f"Input is missing model features {missing}; re-extract it with "
+                         f"extract_features.py (feature schema version {FEATURE_SCHEMA_VERSION})")
+
+
+def save_feature_schema(features, model_dir=MODEL_DIR):
+    with open(os.path.join(model_dir, SCHEMA_FILE), "w", encoding="utf-8") as f:
+        json.dump({"schema_version": FEATURE_SCHEMA_VERSION, "features": features}, f, indent=4)
+
+
+def feature_matrix(df, features=FEATURES):
+    """Contiguous float32 matrix of the feature columns (booleans become 0.0/1.0, NaN stays missing)."""
+    return np.ascontiguousarray(df[features].to_numpy(dtype=np.float32))
+
+
+def predict_labels(df, model, le):
+    features = model_features(model)
+    check_features(df, features)
+    if not hasattr(model, "predict_proba"):  # native Booster
+        return predict_labels_native(feature_matrix(df, features), model, le)
+
+    # === Compact Feature Dtypes (no-op for frames from load_features / extraction) ===
+    X = apply_schema(df[features])
+
+    # === Run Model Prediction ===
+    preds = model.predict(X)
+    return le.inverse_transform(preds)
+
+
+def predict_labels_native(X, booster, le):
+    # Same decision rule as XGBClassifier.predict: argmax over class probabilities
+    probs = booster.inplace_predict(X)
+    if probs.ndim == 1:
+        preds = (probs > 0.5).astype(int)
+    else:
+        preds = probs.argmax(axis=1)
+    return le.inverse_transform(preds)
+
+
+def run_prediction(native=False, nthread=None, input_path=None):
+    # === CONFIG ===
+    INPUT_CSV = input_path or "app/INPUT/input_unlabeled.csv"  # .csv, .feather or parquet
+    OUTPUT_CSV = "app/PREDICTED_OUTPUT.csv"
+
+    # === Load Trained Model and LabelEncoder ===
+    with stage("model_load"):
+        model, le = load_model(native=native, nthread=nthread)
+
+    # === Load Input Data ===
+    with stage("csv_read"):
+        df = load_features(INPUT_CSV)
+    count(bytes_read=os.path.getsize(INPUT_CSV) if os.path.isfile(INPUT_CSV) else 0, rows=len(df))
+
+    with stage("predict"):
+        df["label"] = predict_labels(df, model, le)
+
+    # === Save Predicted Output CSV ===
+    with stage("csv_write"):
+        df[["text", "page", "pdf_file", "label"]].to_csv(OUTPUT_CSV, index=False)
+    count(bytes_written=os.path.getsize(OUTPUT_CSV))
+
+    print(f" Predictions saved to: {OUTPUT_CSV}")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Predict heading labels for input_unlabeled.csv")
+    parser.add_argument("--input", default=None,
+                        help="Feature file to label: CSV, Feather or Parquet (default: app/INPUT/input_unlabeled.csv)")
+    parser.add_argument("--native", action="store_true", help="Use the native Booster fast path")
+    parser.add_argument("--nthread", type=int, default=None, help="Threads for the native Booster")
+    add_report_arguments(parser)
+    return parser.parse_args()
+
+# Optional: Run directly for debugging
+if __name__ == "__main__":
+    args = parse_arguments()
+    report = start_run_from_args("predict_labels", args)
+    run_prediction(args.native, args.nthread, args.input)
+    if report:
+        finish_run(args.report)
@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import json
+import os
+import queue
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from extract_features import extract_pdf_features, BACKENDS
+from feature_sink import apply_schema
+from predict_labels import load_model, predict_labels, model_features, check_features, MODEL_DIR
+from structure_jsonoutput import build_outline
+
+
+class MicroBatcher:
+    """Collects concurrent prediction requests into a single model.predict call.
+
+    Callers block in predict(); a background thread drains the queue, waiting
+    at most max_wait_ms for more work once the first request has arrived.
+    Each request is validated on its own before it joins a batch, and a batch
+    that still fails is retried request by request, so one bad request never
+    fails the others.
+    """
+
+    def __init__(self, model, le, max_batch_rows=20000, max_wait_ms=5):
+        self.model = model
+        self.le = le
+        self.features = model_features(model)
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.batches = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def predict(self, df):
+        if df.empty:
+            return []
+        # Missing columns or values that don't fit the feature dtypes raise here, for this caller only
+        check_features(df, self.features)
+        df = apply_schema(df[self.features])
+        done = threading.Event()
+        item = {"df": df, "done": done, "labels": None, "error": None}
+        self.requests.put(item)
+        done.wait()
+        if item["error"]:
+            raise item["error"]
+        return item["labels"]
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            rows = len(batch[0]["df"])
+            deadline = time.monotonic() + self.max_wait
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item["df"])
+
+            try:
+                self._predict(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0]["error"] = e
+                else:
+                    self._predict_each(batch)
+            for item in batch:
+                item["done"].set()
+
+    def _predict(self, batch):
+        combined = pd.concat([item["df"] for item in batch], ignore_index=True)
+        labels = predict_labels(combined, self.model, self.le)
+        self.batches += 1
+        start = 0
+        for item in batch:
+            end = start + len(item["df"])
+            item["labels"] = list(labels[start:end])
+            start = end
+
+    def _predict_each(self, batch):
+        # Retry a failed batch one request at a time so only the bad request gets the error
+        for item in batch:
+            try:
+                self._predict([item])
+            except Exception as e:
+                item["error"] = e
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    # POST /outline  body: raw PDF bytes        -> {"title", "outline"}
+    # POST /predict  body: JSON list of rows    -> {"labels": [...]}
+    # GET  /health                              -> {"status": "ok", ...}
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send(404, {"error": "not found"})
+        self._send(200, {"status": "ok", "batches": self.server.batcher.batches})
+
+    def do_POST(self):
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path == "/outline":
+                filename = self.headers.get("X-Filename", "document.pdf")
+                self._send(200, self._outline(body, filename))
+            elif self.path == "/predict":
+                df = pd.DataFrame(json.loads(body))
+                self._send(200, {"labels": self.server.batcher.predict(df)})
+            else:
+                self._send(404, {"error": "not found"})
+        except Exception as e:
+            self._send(400, {"error": f"{type(e).__name__}: {e}"})
+
+    def _outline(self, pdf_bytes, filename):
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(pdf_bytes)
+        try:
+            with self.server.extract_lock:
+                df = extract_pdf_features(tmp.name, backend=self.server.backend)
+        finally:
+            os.remove(tmp.name)
+        df["label"] = self.server.batcher.predict(df)
+        return build_outline(df, filename)
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(host="127.0.0.1", port=8080, unix_socket=None, model_dir=MODEL_DIR, backend="pdfminer",
+          max_batch_rows=20000, max_wait_ms=5, native=False, nthread=None):
+    start = time.perf_counter()
+    model, le = load_model(model_dir, native, nthread)
+    print(f" Model loaded in {time.perf_counter() - start:.2f}s")
+
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, PredictionHandler)
+        where = unix_socket
+    else:
+        server = ThreadingHTTPServer((host, port), PredictionHandler)
+        where = f"http://{host}:{port}"
+
+    server.batcher = MicroBatcher(model, le, max_batch_rows, max_wait_ms)
+    server.backend = backend
+    # PyMuPDF is not thread-safe, so concurrent /outline requests take turns extracting
+    server.extract_lock = threading.Lock() if backend == "pymupdf" else contextlib.nullcontext()
+    print(f" Serving predictions on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Long-running heading prediction server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix-socket", default=None, help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Folder with xgb_model.pkl and label_encoder.pkl")
+    parser.add_argument("--backend", choices=BACKENDS, default="pdfminer",
+                        help="PDF text extraction backend for /outline (pymupdf extracts one PDF at a time)")
+    parser.add_argument("--max-batch-rows", type=int, default=20000,
+                        help="Upper bound on rows combined into one model.predict call")
+    parser.add_argument("--max-wait-ms", type=float, default=5,
+                        help="How long to wait for more requests before predicting a batch")
+    parser.add_argument("--native", action="store_true",
+                        help="Predict with the native XGBoost Booster (inplace_predict) fast path")
+    parser.add_argument("--nthread", type=int, default=None, help="XGBoost threads for --native")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    serve(args.host, args.port, args.unix_socket, args.model_dir, args.backend,
+          args.max_batch_rows, args.max_wait_ms, args.native, args.nthread)
@@ -1,67 +1,163 @@
-import os
-import json
-from pathlib import Path
-import pandas as pd
-
-def generate_json_output():
-    input_csv = Path("app/OUTPUT/PREDICTED_OUTPUT.csv")  #  Correct path to predicted CSV
-    output_dir = Path("app/OUTPUT")                      # Output folder for JSON files
-
-    # Ensure output directory exists
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Load the predicted CSV
-    df = pd.read_csv(input_csv)
-
-    # Ensure required columns exist
-    required_cols = {"pdf_file", "text", "page", "label"}
-    if not required_cols.issubset(df.columns):
-        raise ValueError(f"CSV must contain columns: {required_cols}")
-
-    # Sort the DataFrame
-    if "y_pos" in df.columns:
-        df = df.sort_values(by=["pdf_file", "page", "y_pos"], ascending=[True, True, False])
-    else:
-        df = df.sort_values(by=["pdf_file", "page"])
-
-    # Generate JSON per PDF
-    for pdf_file, group in df.groupby("pdf_file"):
-        title = None
-        outline = []
-
-        for _, row in group.iterrows():
-            label = row["label"].strip().upper()
-            if label == "OTHER":
-                continue
-
-            text = str(row["text"]).strip()
-            page = int(row["page"])
-
-            if label == "TITLE" and not title:
-                title = text
-            else:
-                outline.append({
-                    "level": label,
-                    "text": text,
-                    "page": page
-                })
-
-        if not title:
-            title = Path(pdf_file).stem
-
-        output_data = {
-            "title": title,
-            "outline": outline
-        }
-
-        # Save JSON output file
-        output_file = output_dir / f"{Path(pdf_file).stem}.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
-
-        print(f" Processed: {output_file.name}")
-
-if __name__ == "__main__":
-    print(" Starting JSON generation...")
-    generate_json_output()
-    print(" All Done.")
+import os
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from instrumentation import stage, count, add_report_arguments, start_run_from_args, finish_run
+
+
+def sort_lines(df, by=()):
+    """Top-to-bottom order within each page (stable, so ties keep their input order)."""
+    columns = list(by) + ["page"]
+    ascending = [True] * len(columns)
+    if "y_pos" in df.columns:
+        columns.append("y_pos")
+        ascending.append(False)
+    return df.sort_values(by=columns, ascending=ascending, kind="stable")
+
+
+def normalize_labels(labels):
+    return labels.astype(str).str.strip().str.upper()
+
+
+def outline_from_columns(labels, texts, pages, pdf_file):
+    """Build {"title", "outline"} from sorted, OTHER-free label/text/page arrays.
+
+    The title is the first TITLE line with non-empty text. TITLE lines up to
+    and including it are consumed; later TITLE lines stay in the outline.
+    """
+    is_title = labels == "TITLE"
+    candidates = np.flatnonzero(is_title & (texts != ""))
+    if len(candidates):
+        title = texts[candidates[0]]
+        consumed = is_title & (np.arange(len(labels)) <= candidates[0])
+    else:
+        title = Path(pdf_file).stem
+        consumed = is_title
+
+    keep = ~consumed
+    outline = [
+        {"level": level, "text": text, "page": page}
+        for level, text, page in zip(labels[keep].tolist(), texts[keep].tolist(), pages[keep].tolist())
+    ]
+    return {
+        "title": title,
+        "outline": outline
+    }
+
+
+def _columns(df, labels):
+    return (
+        labels.to_numpy(dtype=object),
+        # Missing text renders as "nan", like str() of the NaN read from the CSV
+        df["text"].astype(object).fillna("nan").astype(str).str.strip().to_numpy(dtype=object),
+        df["page"].to_numpy().astype(np.int64),
+    )
+
+
+def build_outline(group, pdf_file):
+    """Build the {"title", "outline"} document for one PDF's predicted lines."""
+    labels = normalize_labels(group["label"])
+    mask = (labels != "OTHER").to_numpy()
+    group = sort_lines(group[mask].assign(label=labels[mask]))
+    return outline_from_columns(*_columns(group, group["label"]), pdf_file)
+
+
+def build_outlines(df):
+    """Yield (pdf_file, outline) for every PDF in df, in sorted pdf_file order.
+
+    OTHER lines are dropped and the remaining lines are sorted once for the
+    whole frame. Each PDF is then a contiguous slice of column arrays.
+    """
+    labels = normalize_labels(df["label"])
+    mask = (labels != "OTHER").to_numpy()
+    kept = sort_lines(df[mask].assign(label=labels[mask]), by=["pdf_file"])
+    label_col, text_col, page_col = _columns(kept, kept["label"])
+
+    files = kept["pdf_file"].to_numpy()
+    bounds = np.flatnonzero(files[1:] != files[:-1]) + 1
+    starts = np.concatenate(([0], bounds)) if len(files) else np.array([], dtype=int)
+    ends = np.concatenate((bounds, [len(files)])) if len(files) else np.array([], dtype=int)
+    slices = {files[start]: (start, end) for start, end in zip(starts, ends)}
+
+    # PDFs whose lines are all OTHER still get a file (title only)
+    for pdf_file in sorted(df["pdf_file"].dropna().unique()):
+        start, end = slices.get(pdf_file, (0, 0))
+        yield pdf_file, outline_from_columns(label_col[start:end], text_col[start:end],
+                                             page_col[start:end], pdf_file)
+
+
+def write_outline(output_dir, pdf_file, output_data, compact=False):
+    output_file = Path(output_dir) / f"{Path(pdf_file).stem}.json"
+    # json.dump always streams through the pure-Python encoder; json.dumps without
+    # indent uses the C encoder, so encode to a string first and write it once
+    if compact:
+        text = json.dumps(output_data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(output_data, indent=2, ensure_ascii=False)
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    return output_file
+
+
+def write_outlines(output_dir, outlines, workers=1, compact=False):
+    """Write (pdf_file, outline) pairs, serially or with a thread pool; yields (pdf_file, outline, path) in order.
+
+    Encoding holds the GIL, so threads only help when the disk is slow; on a
+    local disk 4 threads were no faster than the serial loop.
+    """
+    if workers <= 1:
+        for pdf_file, outline in outlines:
+            yield pdf_file, outline, write_outline(output_dir, pdf_file, outline, compact)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(pdf_file, outline, pool.submit(write_outline, output_dir, pdf_file, outline, compact))
+                   for pdf_file, outline in outlines]
+        for pdf_file, outline, future in futures:
+            yield pdf_file, outline, future.result()
+
+
+def generate_json_output(workers=1, compact=False):
+    input_csv = Path("app/OUTPUT/PREDICTED_OUTPUT.csv")  #  Correct path to predicted CSV
+    output_dir = Path("app/OUTPUT")                      # Output folder for JSON files
+
+    # Ensure output directory exists
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Load the predicted CSV
+    with stage("csv_read"):
+        df = pd.read_csv(input_csv)
+    count(bytes_read=input_csv.stat().st_size, rows=len(df))
+
+    # Ensure required columns exist
+    required_cols = {"pdf_file", "text", "page", "label"}
+    if not required_cols.issubset(df.columns):
+        raise ValueError(f"CSV must contain columns: {required_cols}")
+
+    # Generate JSON per PDF
+    with stage("outline_build"):
+        outlines = list(build_outlines(df))
+    with stage("json_write"):
+        for pdf_file, outline, output_file in write_outlines(output_dir, outlines, workers, compact):
+            count(pdf_file, headings=len(outline["outline"]), bytes_written=output_file.stat().st_size)
+            print(f" Processed: {output_file.name}")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Write one outline JSON per PDF from PREDICTED_OUTPUT.csv")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="Threads writing the JSON files (only worth it on slow/network disks)")
+    parser.add_argument("--compact", action="store_true", help="Write compact JSON instead of indent=2")
+    add_report_arguments(parser)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    report = start_run_from_args("structure_jsonoutput", args)
+    print(" Starting JSON generation...")
+    generate_json_output(args.workers, args.compact)
+    print(" All Done.")
+    if report:
+        finish_run(args.report)
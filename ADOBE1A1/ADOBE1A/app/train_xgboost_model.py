@@ -1,57 +1,320 @@
-import pandas as pd
-import os
-import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-from sklearn.preprocessing import LabelEncoder
-from xgboost import XGBClassifier
-
-# === Load Dataset ===
-df = pd.read_csv("app/FINAL_DATASET_smote.csv")
-
-# === Define Feature Columns ===
-features = [
-    "font_size", "is_bold", "is_italic", "x0", "x1", "y0", "y1", "y_pos",
-    "is_uppercase", "num_words", "text_length",
-    "contains_colon_or_dot", "is_numbered_heading", "has_bullets_or_dashes"
-]
-
-X = df[features].copy()
-
-# Convert boolean columns to integers
-bool_cols = [
-    "is_bold", "is_italic", "is_uppercase",
-    "contains_colon_or_dot", "is_numbered_heading", "has_bullets_or_dashes"
-]
-X[bool_cols] = X[bool_cols].astype(int)
-
-# === Encode Labels ===
-le = LabelEncoder()
-y = le.fit_transform(df["label"])
-
-# === Split Train/Test ===
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, stratify=y, random_state=42
-)
-
-# === Train the Model ===
-model = XGBClassifier(
-    n_estimators=50,
-    max_depth=4,
-    learning_rate=0.1,
-    use_label_encoder=False,  # Avoid deprecation warning
-    eval_metric="mlogloss",
-    random_state=42
-)
-model.fit(X_train, y_train)
-
-# === Evaluate ===
-y_pred = model.predict(X_test)
-print("\n Classification Report:")
-print(classification_report(y_test, y_pred, target_names=le.classes_))
-
-# === Save Model and Label Encoder ===
-os.makedirs("app/model", exist_ok=True)  # <-- creates directory if missing
-joblib.dump(model, "app/model/xgb_model.pkl")
-joblib.dump(le, "app/model/label_encoder.pkl")
-print(" Model + LabelEncoder saved to: app/model/")
+import pandas as pd
+import numpy as np
+import os
+import argparse
+import joblib
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import classification_report
+from sklearn.preprocessing import LabelEncoder
+from xgboost import XGBClassifier
+from feature_sink import FEATHER_EXTENSIONS, TRAINING_DTYPES, apply_schema, load_features
+from predict_labels import (FEATURES, CONTEXT_FEATURES, BOOL_COLS, MODEL_DIR, NATIVE_MODEL_FILE,
+                            feature_matrix, model_features, check_features, save_feature_schema)
+from instrumentation import stage, count, add_report_arguments, start_run_from_args, finish_run
+
+# === CONFIG ===
+DATASET_CSV = "app/FINAL_DATASET_smote.csv"
+
+# Same hyperparameters as the in-memory XGBClassifier
+PARAMS = {
+    "objective": "multi:softprob",
+    "max_depth": 4,
+    "eta": 0.1,
+    "eval_metric": "mlogloss",
+    "seed": 42,
+}
+
+
+def select_features(columns):
+    """Train on the page-context features too when the data has them (feature schema >= 3)."""
+    if all(col in columns for col in CONTEXT_FEATURES):
+        return FEATURES + CONTEXT_FEATURES
+    print(" Data has no page-context columns (feature schema < 3); training on the base features")
+    return FEATURES
+
+
+def save_model(model, le, model_dir=MODEL_DIR):
+    # === Save Model and Label Encoder ===
+    os.makedirs(model_dir, exist_ok=True)  # <-- creates directory if missing
+    joblib.dump(model, f"{model_dir}/xgb_model.pkl")
+    joblib.dump(le, f"{model_dir}/label_encoder.pkl")
+    model.get_booster().save_model(f"{model_dir}/{NATIVE_MODEL_FILE}")  # native format for the inplace_predict fast path
+    save_feature_schema(model_features(model), model_dir)
+    print(f" Model + LabelEncoder saved to: {model_dir}/")
+
+
+def train_in_memory(data_csv=DATASET_CSV, model_dir=MODEL_DIR, n_estimators=50, nthread=None, tree_method="hist"):
+    """Original flow: load the (SMOTE-balanced) CSV, 80/20 stratified split, fit, report."""
+    # === Load Dataset ===
+    with stage("load_data"):
+        df = load_features(data_csv, dtypes=TRAINING_DTYPES)  # float32, SMOTE fractions kept
+    count(rows=len(df))
+
+    features = select_features(df.columns)
+    X = df[features]
+
+    # Convert boolean columns to integers (truncates SMOTE's interpolated flags)
+    X = X.astype({col: "int8" for col in BOOL_COLS})
+
+    # === Encode Labels ===
+    le = LabelEncoder()
+    y = le.fit_transform(df["label"])
+
+    # === Split Train/Test ===
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=42
+    )
+
+    # === Train the Model ===
+    model = XGBClassifier(
+        n_estimators=n_estimators,
+        max_depth=4,
+        learning_rate=0.1,
+        use_label_encoder=False,  # Avoid deprecation warning
+        eval_metric="mlogloss",
+        tree_method=tree_method,
+        n_jobs=nthread,
+        random_state=42
+    )
+    with stage("train"):
+        model.fit(X_train, y_train)
+
+    # === Evaluate ===
+    with stage("evaluate"):
+        y_pred = model.predict(X_test)
+    print("\n Classification Report:")
+    print(classification_report(y_test, y_pred, target_names=le.classes_))
+
+    with stage("save_model"):
+        save_model(model, le, model_dir)
+
+
+def list_feature_files(paths):
+    """Labelled feature files under the given files/directories: *.csv, *.feather/*.arrow and *.parquet, sorted."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, n) for n in names
+                          if n.endswith((".csv", ".parquet") + FEATHER_EXTENSIONS)]
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def file_columns(path):
+    if path.endswith(FEATHER_EXTENSIONS):
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).schema.names
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(path).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def iter_labelled_batches(files, batch_rows, columns):
+    """Yield DataFrames of at most batch_rows rows, reading one chunk at a time."""
+    for path in files:
+        if path.endswith(FEATHER_EXTENSIONS):
+            import pyarrow as pa
+
+            # Memory-mapped: each record batch is sliced without reading the rest of the file
+            with pa.memory_map(path) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i).select(columns)
+                    for start in range(0, batch.num_rows, batch_rows):
+                        yield apply_schema(batch.slice(start, batch_rows).to_pandas(), TRAINING_DTYPES)
+        elif path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+                yield apply_schema(batch.to_pandas(), TRAINING_DTYPES)
+        else:
+            for chunk in pd.read_csv(path, usecols=columns, chunksize=batch_rows):
+                yield apply_schema(chunk, TRAINING_DTYPES)
+
+
+def balanced_class_weights(files, le, batch_rows):
+    """n_rows / (n_classes * n_rows_of_class), like sklearn's class_weight="balanced"."""
+    counts = np.zeros(len(le.classes_), dtype=np.int64)
+    for batch in iter_labelled_batches(files, batch_rows, columns=["label"]):
+        counts += np.bincount(le.transform(batch["label"]), minlength=len(counts))
+    weights = counts.sum() / (len(counts) * np.maximum(counts, 1))
+    return weights.astype(np.float32), counts
+
+
+def scan_labels(files, batch_rows):
+    labels = set()
+    for batch in iter_labelled_batches(files, batch_rows, columns=["label"]):
+        labels.update(batch["label"].unique())
+    return sorted(labels)
+
+
+def make_batch_iter(files, features, le, batch_rows, class_weights=None, split=None, holdout_every=0,
+                    cache_prefix=None):
+    import xgboost as xgb
+
+    class FeatureBatchIter(xgb.DataIter):
+        """Feeds labelled feature files to XGBoost one batch at a time.
+
+        With holdout_every=N, every N-th row (by position in the stream) is
+        the evaluation split and the rest is the training split.
+        """
+
+        def __init__(self):
+            super().__init__(cache_prefix=cache_prefix)
+            self._batches = None
+            self._offset = 0
+
+        def reset(self):
+            self._batches = None
+            self._offset = 0
+
+        def next(self, input_data):
+            if self._batches is None:
+                self._batches = iter_labelled_batches(files, batch_rows, features + ["label"])
+            for batch in self._batches:
+                position = np.arange(self._offset, self._offset + len(batch))
+                self._offset += len(batch)
+                if holdout_every:
+                    held_out = position % holdout_every == 0
+                    batch = batch[held_out if split == "eval" else ~held_out]
+                if not len(batch):
+                    continue
+
+                y = le.transform(batch["label"])
+                weight = class_weights[y] if class_weights is not None else None
+                input_data(data=feature_matrix(batch, features), label=y, weight=weight, feature_names=features)
+                return True
+            return False
+
+    return FeatureBatchIter()
+
+
+def train_streaming(data_paths, model_dir=MODEL_DIR, n_estimators=50, nthread=None, tree_method="hist",
+                    batch_rows=100_000, class_weights="balanced", resume=False, eval_fraction=0.2,
+                    cache_dir=None):
+    """Out-of-core training: feature files are streamed through an xgboost DataIter.
+
+    Without cache_dir the batches are quantized into a QuantileDMatrix (only
+    the hist bins stay in memory); with cache_dir XGBoost's external-memory
+    DMatrix pages them to disk. With resume, boosting continues from the
+    model in model_dir and its label encoder is reused.
+    """
+    import xgboost as xgb
+
+    files = list_feature_files(data_paths)
+    if not files:
+        raise SystemExit(f" No .csv or .parquet feature files found in: {', '.join(data_paths)}")
+
+    with stage("scan_labels"):
+        labels = scan_labels(files, batch_rows)
+        base_model = None
+        if resume:
+            le = joblib.load(f"{model_dir}/label_encoder.pkl")
+            unknown = sorted(set(labels) - set(le.classes_))
+            if unknown:
+                raise SystemExit(f" Labels not known to the existing model: {unknown}. Retrain from scratch.")
+            base_model = joblib.load(f"{model_dir}/xgb_model.pkl").get_booster()
+            # Keep boosting on exactly the features the existing trees were built on
+            features = model_features(base_model)
+            for path in files:
+                try:
+                    check_features(pd.DataFrame(columns=file_columns(path)), features)
+                except ValueError as e:
+                    raise SystemExit(f" {path}: {e}")
+        else:
+            le = LabelEncoder().fit(labels)
+            features = select_features(set.intersection(*(set(file_columns(path)) for path in files)))
+
+        weights = None
+        if class_weights == "balanced":
+            weights, counts = balanced_class_weights(files, le, batch_rows)
+            for label, n, w in zip(le.classes_, counts, weights):
+                print(f"   {label:<8} {n:10d} rows  weight {w:.3f}")
+
+    holdout_every = round(1 / eval_fraction) if eval_fraction else 0
+    with stage("build_dmatrix"):
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            train_iter = make_batch_iter(files, features, le, batch_rows, weights, "train", holdout_every,
+                                         os.path.join(cache_dir, "train"))
+            dtrain = xgb.DMatrix(train_iter, nthread=nthread)
+        else:
+            train_iter = make_batch_iter(files, features, le, batch_rows, weights, "train", holdout_every)
+            dtrain = xgb.QuantileDMatrix(train_iter, nthread=nthread)
+    count(rows=dtrain.num_row())
+
+    params = dict(PARAMS, num_class=len(le.classes_), tree_method=tree_method)
+    if nthread:
+        params["nthread"] = nthread
+    with stage("train"):
+        booster = xgb.train(params, dtrain, num_boost_round=n_estimators, xgb_model=base_model)
+    print(f" Trained {n_estimators} rounds; the model now has {booster.num_boosted_rounds()} trees per class")
+
+    if holdout_every:
+        with stage("evaluate"):
+            if cache_dir:
+                eval_iter = make_batch_iter(files, features, le, batch_rows, None, "eval", holdout_every,
+                                            os.path.join(cache_dir, "eval"))
+                deval = xgb.DMatrix(eval_iter, nthread=nthread)
+            else:
+                eval_iter = make_batch_iter(files, features, le, batch_rows, None, "eval", holdout_every)
+                deval = xgb.QuantileDMatrix(eval_iter, ref=dtrain, nthread=nthread)
+            y_pred = booster.predict(deval).argmax(axis=1)
+            y_test = deval.get_label().astype(int)
+        print("\n Classification Report (every %d-th row held out):" % holdout_every)
+        print(classification_report(y_test, y_pred, labels=np.arange(len(le.classes_)),
+                                    target_names=le.classes_, zero_division=0))
+
+    with stage("save_model"):
+        # Wrap the Booster so predict_labels keeps loading an XGBClassifier pickle
+        os.makedirs(model_dir, exist_ok=True)
+        native_path = os.path.join(model_dir, NATIVE_MODEL_FILE)
+        booster.save_model(native_path)
+        model = XGBClassifier()
+        model.load_model(native_path)
+        save_model(model, le, model_dir)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Train the heading classifier")
+    parser.add_argument("--data", nargs="+", default=[DATASET_CSV],
+                        help="Labelled feature CSV (in-memory mode), or CSV/Parquet files and folders (--stream)")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Where to write (and, with --resume, read) the model")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the data through an XGBoost DataIter instead of loading it into pandas")
+    parser.add_argument("--resume", action="store_true",
+                        help="--stream: keep boosting from the existing model in --model-dir")
+    parser.add_argument("--n-estimators", type=int, default=50, help="Boosting rounds (added rounds with --resume)")
+    parser.add_argument("--nthread", type=int, default=None, help="XGBoost threads (default: all cores)")
+    parser.add_argument("--tree-method", default="hist", help="XGBoost tree_method (default: hist)")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="--stream: rows per batch")
+    parser.add_argument("--class-weights", choices=["balanced", "none"], default="balanced",
+                        help="--stream: weight rows by inverse class frequency instead of SMOTE oversampling")
+    parser.add_argument("--eval-fraction", type=float, default=0.2,
+                        help="--stream: share of rows held out for the classification report (0 disables)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="--stream: page batches to this directory with XGBoost's external-memory DMatrix")
+    add_report_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    # Always record stages, so every run ends with its wall time and peak memory
+    start_run_from_args("train_xgboost_model", args, force=True)
+    if args.stream:
+        train_streaming(args.data, args.model_dir, args.n_estimators, args.nthread, args.tree_method,
+                        args.batch_rows, None if args.class_weights == "none" else args.class_weights,
+                        args.resume, args.eval_fraction, args.cache_dir)
+    else:
+        if args.resume:
+            raise SystemExit(" --resume needs --stream")
+        train_in_memory(args.data[0], args.model_dir, args.n_estimators, args.nthread, args.tree_method)
+    report = finish_run(args.report)
+    print(f" Wall time: {report['wall_s']:.1f}s, peak RSS: {report['peak_rss_mb']} MB")
@@ -1,7 +1,69 @@
 
 
 import os
+import json
+import inspect
 from sentence_transformers import SentenceTransformer
+from encoders import ONNX_DIR, ONNX_MODEL_FILE, ONNX_INT8_MODEL_FILE, ONNX_CONFIG_FILE
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+def export_onnx(model, onnx_dir=ONNX_DIR):
+    """Export the transformer of a SentenceTransformer to ONNX, plus an int8-quantized copy.
+
+    Pooling and normalization are done by encoders.OnnxEncoder, so only the
+    token-level transformer goes into the graph.
+    """
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(onnx_dir, exist_ok=True)
+    transformer = model[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(onnx_dir)
+
+    sample = tokenizer(["This is a test sentence."], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "tokens"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+
+    class TokenEmbeddings(torch.nn.Module):
+        # forward() argument order differs between transformers versions, so pass by name
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)), return_dict=False)[0]
+
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False  # classic exporter; dynamic_axes as below
+
+    model_path = os.path.join(onnx_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(auto_model),
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **export_kwargs
+        )
+    quantize_dynamic(model_path, os.path.join(onnx_dir, ONNX_INT8_MODEL_FILE), weight_type=QuantType.QInt8)
+
+    with open(os.path.join(onnx_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": MODEL_NAME,
+            "dim": model.get_sentence_embedding_dimension(),
+            "max_seq_length": model.max_seq_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id
+        }, f, indent=4)
+    print(f"ONNX model (fp32 + int8) exported to {onnx_dir}")
 
 def cache_models():
    
@@ -13,14 +75,17 @@ def cache_models():
     
     try:
         # Download and cache the sentence transformer model
-        print("Download SentenceTransformer model: all-MiniLM-L6-v2")
-        model = SentenceTransformer('all-MiniLM-L6-v2')
+        print(f"Download SentenceTransformer model: {MODEL_NAME}")
+        model = SentenceTransformer(MODEL_NAME)
         
         # Test the model to ensure it's working
         test_sentence = "This is a test sentence."
         embedding = model.encode(test_sentence)
         print(f"Model loaded successfull. Test embedding shape: {embedding.shape}")
         
+        # Export the ONNX / int8 variants used by --encoder onnx and onnx-int8
+        export_onnx(model)
+
         print("Model caching completed successfull!")
         
     except Exception as e:
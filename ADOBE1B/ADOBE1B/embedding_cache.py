@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import re
+import numpy as np
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class EmbeddingStore:
+    """On-disk page embeddings, keyed by PDF content hash, model name and text version.
+
+    Each document is stored as two files:
+      <hash>.npy   - (pages x dim) embedding matrix, loaded memory-mapped
+      <hash>.json  - page index: [[page_number, raw_page_text], ...]
+    Entries live under a directory named after the model and clean_text version,
+    so changing either never reuses stale vectors.
+    """
+
+    def __init__(self, cache_dir, model_name, text_version, dtype="float32"):
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.root = os.path.join(cache_dir, f"{safe_model}-text-v{text_version}")
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def key_for(self, pdf_path):
+        return file_sha256(pdf_path)
+
+    def _paths(self, key):
+        return os.path.join(self.root, f"{key}.npy"), os.path.join(self.root, f"{key}.json")
+
+    def load(self, key):
+        """Return (pages, embeddings) or None if the document is not cached."""
+        npy_path, index_path = self._paths(key)
+        if not (os.path.exists(npy_path) and os.path.exists(index_path)):
+            self.misses += 1
+            return None
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                pages = [tuple(page) for page in json.load(f)]
+            embeddings = np.load(npy_path, mmap_mode="r")
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pages, embeddings
+
+    def save(self, key, pages, embeddings):
+        npy_path, index_path = self._paths(key)
+        tmp_npy = f"{npy_path}.{os.getpid()}.tmp.npy"
+        tmp_index = f"{index_path}.{os.getpid()}.tmp"
+
+        np.save(tmp_npy, np.asarray(embeddings, dtype=self.dtype))
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump([list(page) for page in pages], f, ensure_ascii=False)
+        # Write the matrix first: load() only trusts entries whose index exists
+        os.replace(tmp_npy, npy_path)
+        os.replace(tmp_index, index_path)
@@ -0,0 +1,90 @@
+import os
+import json
+import numpy as np
+
+# Where cache_models.py writes the ONNX export of the sentence embedding model
+ONNX_DIR = os.path.expanduser("~/.cache/minilm-onnx")
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model.int8.onnx"
+ONNX_CONFIG_FILE = "encoder_config.json"
+
+ENCODERS = ["torch", "torch-int8", "onnx", "onnx-int8"]
+
+
+class OnnxEncoder:
+    """MiniLM sentence encoder on onnxruntime: tokenize, run, mean-pool, normalize.
+
+    Mirrors SentenceTransformer.encode for the all-MiniLM-L6-v2 pipeline
+    (Transformer -> mean pooling -> L2 normalize) without importing torch.
+    """
+
+    def __init__(self, onnx_dir=ONNX_DIR, quantized=False, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(onnx_dir, ONNX_CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(onnx_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        self.session = ort.InferenceSession(os.path.join(onnx_dir, model_file), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self):
+        return self.config["dim"]
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=True, **kwargs):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(sentences), self.config["dim"]), dtype=np.float32)
+
+        # Encode in length order so each batch pads to a similar length
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([sentences[i] for i in idx])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            mask = feeds["attention_mask"][:, :, None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            embeddings[idx] = pooled
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.clip(norms, 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(model_name, encoder="torch", onnx_dir=ONNX_DIR, threads=None):
+    """Sentence encoder with a SentenceTransformer-compatible encode().
+
+    torch       - SentenceTransformer as before
+    torch-int8  - SentenceTransformer with dynamically int8-quantized Linear layers
+    onnx        - ONNX export on onnxruntime (no torch import)
+    onnx-int8   - int8-quantized ONNX export on onnxruntime
+    """
+    if encoder in ("onnx", "onnx-int8"):
+        return OnnxEncoder(onnx_dir, quantized=encoder == "onnx-int8", threads=threads)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if threads:
+        torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name)
+    if encoder == "torch-int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
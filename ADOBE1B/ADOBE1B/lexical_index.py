@@ -0,0 +1,76 @@
+import json
+import numpy as np
+from scipy import sparse
+
+
+class LexicalIndex:
+    """Corpus-level BM25 index over page (or section) texts.
+
+    The BM25 weight of every (page, term) pair is precomputed into one sparse
+    matrix, so scoring a set of query prompts against all pages is a single
+    sparse matrix-vector product.
+    """
+
+    def __init__(self, vocabulary, weights):
+        self.vocabulary = vocabulary
+        self.weights = weights.tocsr()
+        self._analyzer = None
+
+    @property
+    def analyzer(self):
+        # sklearn is slow to import; only pay for it once a query is scored
+        if self._analyzer is None:
+            from sklearn.feature_extraction.text import CountVectorizer
+            self._analyzer = CountVectorizer(stop_words='english').build_analyzer()
+        return self._analyzer
+
+    @classmethod
+    def build(cls, texts, k1=1.5, b=0.75):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        vectorizer = CountVectorizer(stop_words='english')
+        try:
+            tf = vectorizer.fit_transform(texts).tocsr().astype(np.float32)
+        except ValueError:  # empty vocabulary, e.g. only stop words
+            return cls({}, sparse.csr_matrix((len(texts), 0), dtype=np.float32))
+
+        n_docs = tf.shape[0]
+        doc_freq = np.bincount(tf.indices, minlength=tf.shape[1])
+        idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        avg_len = doc_len.mean() or 1.0
+        rows = np.repeat(np.arange(n_docs), np.diff(tf.indptr))
+        norm = k1 * (1 - b + b * doc_len[rows] / avg_len)
+        data = idf[tf.indices] * tf.data * (k1 + 1) / (tf.data + norm)
+
+        weights = sparse.csr_matrix((data.astype(np.float32), tf.indices, tf.indptr), shape=tf.shape)
+        vocabulary = {term: int(i) for term, i in vectorizer.vocabulary_.items()}
+        return cls(vocabulary, weights)
+
+    def query_vector(self, queries):
+        q = np.zeros(self.weights.shape[1], dtype=np.float32)
+        for query in queries:
+            for token in self.analyzer(query):
+                i = self.vocabulary.get(token)
+                if i is not None:
+                    q[i] += 1
+        return q
+
+    def score(self, queries, rows=None):
+        """BM25 scores of the query prompts, scaled to [0, 1] over the scored pages."""
+        weights = self.weights if rows is None else self.weights[rows]
+        scores = weights @ self.query_vector(queries)
+        top = scores.max() if len(scores) else 0
+        return scores / top if top > 0 else scores
+
+    def save(self, prefix):
+        sparse.save_npz(f"{prefix}.npz", self.weights)
+        with open(f"{prefix}.vocab.json", "w", encoding="utf-8") as f:
+            json.dump(self.vocabulary, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, prefix):
+        with open(f"{prefix}.vocab.json", encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        return cls(vocabulary, sparse.load_npz(f"{prefix}.npz"))
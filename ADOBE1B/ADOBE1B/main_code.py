@@ -1,241 +1,630 @@
-# SECTION 1: Setup and Imports
-import os
-import sys
-import json
-import re
-import fitz  # PyMuPDF
-from datetime import datetime
-from sentence_transformers import SentenceTransformer, util
-from sklearn.feature_extraction.text import TfidfVectorizer
-import argparse
-
-# SECTION 2: Utility Functions
-def clean_text(text):
-    text = re.sub(r'[•●\u2022]+', '', text)
-    text = re.sub(r'\s{2,}', ' ', text.replace('\n', ' ')).strip()
-    return text
-
-def extract_heading_candidates(page_text):
-    lines = page_text.split("\n")
-    candidates = []
-    
-    # Strategy 1: Look for traditional heading patterns
-    for line in lines[:10]:  # Check first 10 lines
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Remove common PDF artifacts
-        clean_line = re.sub(r'^\d+\s*', '', line)  # Remove leading numbers
-        clean_line = re.sub(r'\s*\d+\s*$', '', clean_line)  # Remove trailing page numbers
-        clean_line = clean_line.strip()
-        
-        if (len(clean_line) > 3 and len(clean_line) < 100 and 
-            len(clean_line.split()) <= 12 and
-            (clean_line.isupper() or clean_line.istitle() or 
-             any(word[0].isupper() for word in clean_line.split() if word))):
-            candidates.append(clean_line)
-    
-    # Strategy 2: Look for lines with specific formatting patterns
-    for line in lines[:15]:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Look for bold-like patterns or section indicators
-        if (re.match(r'^[A-Z][a-zA-Z\s:.-]+$', line) and 
-            len(line) > 5 and len(line) < 80 and
-            len(line.split()) <= 10):
-            candidates.append(line)
-    
-    # Strategy 3: Extract meaningful phrases from the beginning
-    if not candidates:
-        first_meaningful_lines = []
-        for line in lines[:5]:
-            line = line.strip()
-            if len(line) > 10 and len(line) < 150:
-                # Clean up and extract first meaningful sentence
-                clean_line = re.sub(r'^[^\w]*', '', line)
-                clean_line = re.sub(r'[^\w\s:.-].*$', '', clean_line)
-                if clean_line and len(clean_line.split()) >= 2:
-                    first_meaningful_lines.append(clean_line[:80])
-        
-        if first_meaningful_lines:
-            candidates.extend(first_meaningful_lines[:2])
-    
-    # Strategy 4: Fallback to document keywords
-    if not candidates:
-        # Look for document-specific keywords that might indicate content type
-        doc_keywords = re.findall(r'\b(?:Learn|Guide|Tips|How to|Tutorial|Instructions|Overview|Introduction|Chapter|Section|Part)\s+[A-Za-z\s-]+\b', page_text[:500])
-        if doc_keywords:
-            candidates.append(doc_keywords[0][:60])
-    
-    # Final fallback with more context
-    if not candidates:
-        words = page_text.split()[:15]  # First 15 words
-        if len(words) >= 3:
-            candidates.append(' '.join(words))
-        else:
-            candidates.append("Document Content")
-    
-    # Return the best candidate, prioritizing shorter, cleaner titles
-    if candidates:
-        # Sort by length and cleanliness, prefer shorter titles
-        candidates = sorted(set(candidates), key=lambda x: (len(x), x.lower()))
-        return [candidates[0]]
-    
-    return ["Document Section"]
-
-def extract_pages(pdf_path):
-    doc = fitz.open(pdf_path)
-    pages = []
-    for i, page in enumerate(doc):
-        text = page.get_text()
-        if len(text.strip()) < 50:  # Skip blank pages
-            continue
-        pages.append((i+1, text))
-    doc.close()
-    return pages
-
-def parse_arguments():
-    """Parse command line arguments for input and output directories."""
-    parser = argparse.ArgumentParser(description='Process PDF documents for persona-based content extraction')
-    
-    # Default to current directory structure for local development, Docker will override these
-    default_input = './input' if os.path.exists('./input') else '/app/input'
-    default_output = './output' if os.path.exists('./output') else '/app/output'
-    
-    parser.add_argument('--input-dir', '-i', default=default_input, 
-                       help='Input directory containing input.json and PDF files (default: ./input or /app/input)')
-    parser.add_argument('--output-dir', '-o', default=default_output, 
-                       help='Output directory for results (default: ./output or /app/output)')
-    return parser.parse_args()
-
-def main():
-    """Main function to orchestrate the PDF processing pipeline."""
-    try:
-        # Parse command line arguments
-        args = parse_arguments()
-        input_dir = args.input_dir
-        output_dir = args.output_dir
-
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
-
-        # SECTION 3: Load Metadata
-        metadata_path = os.path.join(input_dir, "input.json")
-        if not os.path.exists(metadata_path):
-            print(f"Error: metadata file not found at {metadata_path}")
-            sys.exit(1)
-
-        with open(metadata_path) as f:
-            metadata = json.load(f)
-
-        input_docs = [doc["filename"] for doc in metadata["documents"]]
-        persona = metadata["persona"] if isinstance(metadata["persona"], str) else metadata["persona"]["role"]
-        job = metadata["job_to_be_done"] if isinstance(metadata["job_to_be_done"], str) else metadata["job_to_be_done"]["task"]
-
-        # SECTION 4: Dynamic Query Builder
-        base_prompt = f"You are a {persona} and your goal is to {job}."
-        queries = [
-            base_prompt,
-            f"Which sections in the documents help a {persona} to {job}?",
-            f"What content should be used to {job}?",
-            f"Identify key suggestions, locations, or tips for: {job}",
-            f"Find relevant sections to achieve the goal: {job}"
-        ]
-
-        # SECTION 5: Load Sentence Embedding Model
-        print("Load sentence embedding model...")
-        model = SentenceTransformer('all-MiniLM-L6-v2')  # ~80MB
-        query_embeddings = model.encode(queries)
-
-        # SECTION 6: Process PDFs and Score Pages
-        print("Processing PDF documents...")
-        ranked_pages = []
-        tfidf = TfidfVectorizer(stop_words='english')
-        tfidf.fit(queries)
-
-        for doc_name in input_docs:
-            pdf_path = os.path.join(input_dir, doc_name)
-            if not os.path.exists(pdf_path):
-                print(f"Warning: PDF file not found: {pdf_path}")
-                continue
-            
-            print(f"Processing: {doc_name}")
-            pages = extract_pages(pdf_path)
-            page_texts = [clean_text(text) for (_, text) in pages]
-            
-            if not page_texts:  # Skip if no valid pages found
-                continue
-                
-            embeddings = model.encode(page_texts)
-            tfidf_scores = tfidf.transform(page_texts).mean(axis=1).A1
-
-            for (page_num, text), embedding, tfidf_score in zip(pages, embeddings, tfidf_scores):
-                semantic_score = max([util.cos_sim(qe, embedding).item() for qe in query_embeddings])
-                final_score = 0.7 * semantic_score + 0.3 * tfidf_score
-
-                ranked_pages.append({
-                    "document": doc_name,
-                    "page_number": page_num,
-                    "text": text,
-                    "score": final_score
-                })
-
-        if not ranked_pages:
-            print("Error: No valid pages found in any PDF documents")
-            sys.exit(1)
-
-        # SECTION 7: Sort Pages and Enforce Document Diversity
-        ranked_pages = sorted(ranked_pages, key=lambda x: -x["score"])
-        seen_docs = set()
-        final_ranked = []
-
-        for page in ranked_pages:
-            if page["document"] not in seen_docs:
-                seen_docs.add(page["document"])
-                final_ranked.append(page)
-            if len(final_ranked) == 5:
-                break
-
-        # SECTION 8: Build Output JSON
-        output = {
-            "metadata": {
-                "input_documents": input_docs,
-                "persona": persona,
-                "job_to_be_done": job,
-                "processing_timestamp": datetime.now().isoformat()
-            },
-            "extracted_sections": [],
-            "subsection_analysis": []
-        }
-
-        for rank, page in enumerate(final_ranked, 1):
-            heading = extract_heading_candidates(page["text"])[0]
-            output["extracted_sections"].append({
-                "document": page["document"],
-                "section_title": heading,
-                "importance_rank": rank,
-                "page_number": page["page_number"]
-            })
-            output["subsection_analysis"].append({
-                "document": page["document"],
-                "refined_text": clean_text(page["text"]),
-                "page_number": page["page_number"]
-            })
-
-        # SECTION 9: Save Output
-        output_path = os.path.join(output_dir, "output.json")
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(output, f, indent=4, ensure_ascii=False)
-
-        print(f"Final Output saved to {output_path}")
-        print("Process completed successfull!")
-
-    except Exception as e:
-        print(f"Error during processing: {e}")
-        sys.exit(1)
-
-if __name__ == "__main__":
-    main()
+# SECTION 1: Setup and Imports
+# Heavy libraries (fitz, torch/sentence_transformers, sklearn, onnxruntime) are
+# imported lazily inside the functions that need them to keep cold start short.
+import time
+PROCESS_START = time.perf_counter()
+
+import os
+import sys
+import json
+import re
+import queue
+import threading
+import numpy as np
+from datetime import datetime
+from embedding_cache import EmbeddingStore
+from lexical_index import LexicalIndex
+from ranking import StreamingTopK
+from encoders import load_encoder, ENCODERS
+from instrumentation import stage, count, record, add_report_arguments, start_run_from_args, finish_run
+import hashlib
+import argparse
+
+MODEL_NAME = 'all-MiniLM-L6-v2'  # ~80MB
+
+# Bump when clean_text or the blank-page filter in extract_pages changes,
+# so cached page embeddings are recomputed.
+CLEAN_TEXT_VERSION = 1
+
+# SECTION 2: Utility Functions
+def clean_text(text):
+    text = re.sub(r'[•●\u2022]+', '', text)
+    text = re.sub(r'\s{2,}', ' ', text.replace('\n', ' ')).strip()
+    return text
+
+def extract_heading_candidates(page_text):
+    lines = page_text.split("\n")
+    candidates = []
+    
+    # Strategy 1: Look for traditional heading patterns
+    for line in lines[:10]:  # Check first 10 lines
+        line = line.strip()
+        if not line:
+            continue
+            
+        # Remove common PDF artifacts
+        clean_line = re.sub(r'^\d+\s*', '', line)  # Remove leading numbers
+        clean_line = re.sub(r'\s*\d+\s*$', '', clean_line)  # Remove trailing page numbers
+        clean_line = clean_line.strip()
+        
+        if (len(clean_line) > 3 and len(clean_line) < 100 and 
+            len(clean_line.split()) <= 12 and
+            (clean_line.isupper() or clean_line.istitle() or 
+             any(word[0].isupper() for word in clean_line.split() if word))):
+            candidates.append(clean_line)
+    
+    # Strategy 2: Look for lines with specific formatting patterns
+    for line in lines[:15]:
+        line = line.strip()
+        if not line:
+            continue
+            
+        # Look for bold-like patterns or section indicators
+        if (re.match(r'^[A-Z][a-zA-Z\s:.-]+$', line) and 
+            len(line) > 5 and len(line) < 80 and
+            len(line.split()) <= 10):
+            candidates.append(line)
+    
+    # Strategy 3: Extract meaningful phrases from the beginning
+    if not candidates:
+        first_meaningful_lines = []
+        for line in lines[:5]:
+            line = line.strip()
+            if len(line) > 10 and len(line) < 150:
+                # Clean up and extract first meaningful sentence
+                clean_line = re.sub(r'^[^\w]*', '', line)
+                clean_line = re.sub(r'[^\w\s:.-].*$', '', clean_line)
+                if clean_line and len(clean_line.split()) >= 2:
+                    first_meaningful_lines.append(clean_line[:80])
+        
+        if first_meaningful_lines:
+            candidates.extend(first_meaningful_lines[:2])
+    
+    # Strategy 4: Fallback to document keywords
+    if not candidates:
+        # Look for document-specific keywords that might indicate content type
+        doc_keywords = re.findall(r'\b(?:Learn|Guide|Tips|How to|Tutorial|Instructions|Overview|Introduction|Chapter|Section|Part)\s+[A-Za-z\s-]+\b', page_text[:500])
+        if doc_keywords:
+            candidates.append(doc_keywords[0][:60])
+    
+    # Final fallback with more context
+    if not candidates:
+        words = page_text.split()[:15]  # First 15 words
+        if len(words) >= 3:
+            candidates.append(' '.join(words))
+        else:
+            candidates.append("Document Content")
+    
+    # Return the best candidate, prioritizing shorter, cleaner titles
+    if candidates:
+        # Sort by length and cleanliness, prefer shorter titles
+        candidates = sorted(set(candidates), key=lambda x: (len(x), x.lower()))
+        return [candidates[0]]
+    
+    return ["Document Section"]
+
+def is_heading_line(line):
+    """Same formatting rule as Strategy 2 of extract_heading_candidates."""
+    return bool(re.match(r'^[A-Z][a-zA-Z\s:.-]+$', line) and
+                len(line) > 5 and len(line) < 80 and
+                len(line.split()) <= 10)
+
+def split_sections(page_text):
+    """Split a page into heading-delimited sections: [(title, raw_text), ...].
+
+    Text before the first heading on a page forms its own section, titled with
+    the usual page-level heading heuristics.
+    """
+    sections = []
+    title, lines = None, []
+    for line in page_text.split("\n"):
+        stripped = line.strip()
+        if stripped and is_heading_line(stripped):
+            if any(l.strip() for l in lines):
+                sections.append((title, "\n".join(lines)))
+            title, lines = stripped, [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((title, "\n".join(lines)))
+
+    return [(t if t else extract_heading_candidates(text)[0], text) for t, text in sections]
+
+def iter_pages(pdf_path):
+    """Yield (page_number, raw_text) for every non-blank page, one page at a time."""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(pdf_path)
+    try:
+        for i, page in enumerate(doc):
+            text = page.get_text()
+            if len(text.strip()) < 50:  # Skip blank pages
+                continue
+            yield i+1, text
+    finally:
+        doc.close()
+
+def extract_pages(pdf_path):
+    return list(iter_pages(pdf_path))
+
+def fetch_page_texts(input_dir, keys):
+    """Raw text of the given (doc_name, page_number) pages, read back from the PDFs.
+
+    Used for the final winners only, so the corpus never has to hold the raw
+    text of every page. Each PDF is opened once.
+    """
+    import fitz  # PyMuPDF
+
+    texts = {}
+    by_doc = {}
+    for doc_name, page_num in keys:
+        by_doc.setdefault(doc_name, []).append(page_num)
+    for doc_name, page_nums in by_doc.items():
+        with fitz.open(os.path.join(input_dir, doc_name)) as doc:
+            for page_num in page_nums:
+                texts[(doc_name, page_num)] = doc[page_num - 1].get_text()
+    return texts
+
+# Pages handed from a parse worker to the encoder in one queue item
+PARSE_CHUNK_PAGES = 16
+
+def _put(q, item, cancel):
+    """Blocking put that gives up once the consumer has cancelled the pipeline."""
+    while not cancel.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _parse_worker(misses, q, cancel):
+    """Producer: parse and clean the PDFs one after another, pushing chunks of pages onto the queue.
+
+    PyMuPDF is not thread-safe, so this is the only thread that opens PDFs
+    while the pipeline runs. Queue items are (slot, pages, cleaned_texts,
+    parse_seconds, error); an item with pages=None marks the end of a
+    document. Stops at the next document (or queue put) once cancel is set.
+    """
+    for slot, pdf_path in misses:
+        if cancel.is_set():
+            return
+        chunk, cleaned = [], []
+        started = time.perf_counter()
+        try:
+            for page in iter_pages(pdf_path):
+                chunk.append(page)
+                cleaned.append(clean_text(page[1]))
+                if len(chunk) >= PARSE_CHUNK_PAGES:
+                    if not _put(q, (slot, chunk, cleaned, time.perf_counter() - started, None), cancel):
+                        return
+                    chunk, cleaned = [], []
+                    started = time.perf_counter()
+            if chunk and not _put(q, (slot, chunk, cleaned, time.perf_counter() - started, None), cancel):
+                return
+            if not _put(q, (slot, None, None, 0.0, None), cancel):
+                return
+        except Exception as e:
+            _put(q, (slot, None, None, 0.0, e), cancel)
+            return
+
+def embed_corpus(input_dir, input_docs, model, store=None, encode_batch=256, queue_size=8):
+    """Parse and embed every page of the input documents.
+
+    Returns (all_pages, doc_ids, page_texts, page_embeddings), where all_pages
+    holds (doc_name, page_number) keys and page_texts the cleaned texts. Raw
+    page text is only kept while it waits to be written to the embedding
+    store; fetch_page_texts reads it back for the pages that get ranked.
+    Documents found in the embedding store skip both PDF parsing and encoding.
+
+    The rest go through a two-stage pipeline: one parser thread parses and
+    cleans the PDFs into a bounded queue of page chunks (so a huge PDF cannot
+    run ahead of the encoder), while this thread encodes cross-document batches
+    of encode_batch pages. The encoder releases the GIL while it computes, so
+    parsing the next pages overlaps with encoding the previous ones.
+    """
+    docs = []  # (doc_name, [pages], [cleaned texts], [embedding blocks], store key)
+    misses = []
+    for doc_name in input_docs:
+        pdf_path = os.path.join(input_dir, doc_name)
+        if not os.path.exists(pdf_path):
+            print(f"Warning: PDF file not found: {pdf_path}")
+            continue
+
+        print(f"Processing: {doc_name}")
+        key = store.key_for(pdf_path) if store else None
+        cached = None
+        if store:
+            with stage("cache_load", doc_name):
+                cached = store.load(key)
+        if cached:
+            pages, embeddings = cached
+            docs.append((doc_name, list(pages), [clean_text(text) for (_, text) in pages], [embeddings], key))
+        else:
+            docs.append((doc_name, [], [], [], key))
+            misses.append((len(docs) - 1, pdf_path))
+
+    if misses:
+        with stage("pipeline"):
+            _run_embed_pipeline(docs, misses, model, encode_batch, queue_size,
+                                keep_raw=store is not None)
+        if store:
+            for slot, _ in misses:
+                _, pages, _, blocks, key = docs[slot]
+                store.save(key, pages, np.vstack(blocks) if blocks else np.empty((0, 0), np.float32))
+
+    all_pages = []  # (doc_name, page_number)
+    doc_ids = []
+    page_texts = []
+    blocks = []
+    doc_index = {}
+    for doc_name, pages, cleaned, doc_blocks, _ in docs:
+        for page_num, _ in pages:
+            all_pages.append((doc_name, page_num))
+            doc_ids.append(doc_index.setdefault(doc_name, len(doc_index)))
+        page_texts.extend(cleaned)
+        blocks.extend(b for b in doc_blocks if len(b))
+
+    page_embeddings = np.vstack(blocks).astype(np.float32) if blocks else np.empty((0, 0), np.float32)
+    return all_pages, doc_ids, page_texts, page_embeddings
+
+def _run_embed_pipeline(docs, misses, model, encode_batch, queue_size, keep_raw=True):
+    q = queue.Queue(maxsize=max(1, queue_size))
+    cancel = threading.Event()
+    pending = []  # (slot, cleaned text) waiting for the next encoder batch
+
+    def encode_pending():
+        texts = [text for (_, text) in pending]
+        with stage("page_encode"):
+            embeddings = model.encode(texts, batch_size=64, normalize_embeddings=True)
+        count(pages_encoded=len(texts))
+        # Pages of one document arrive in order, so consecutive rows belong together
+        start = 0
+        while start < len(pending):
+            slot = pending[start][0]
+            end = start
+            while end < len(pending) and pending[end][0] == slot:
+                end += 1
+            docs[slot][3].append(np.asarray(embeddings[start:end], dtype=np.float32))
+            start = end
+        pending.clear()
+
+    parse_thread = threading.Thread(target=_parse_worker, args=(misses, q, cancel), daemon=True)
+    parse_thread.start()
+    try:
+        remaining = len(misses)
+        while remaining:
+            slot, pages, cleaned, parse_seconds, error = q.get()
+            if error is not None:
+                raise error
+            if pages is None:
+                remaining -= 1
+                continue
+            # Parse time is measured in the worker, excluding time blocked on the queue
+            doc_name = docs[slot][0]
+            record("pdf_parse", parse_seconds, doc_name)
+            count(doc_name, pages=len(pages), lines=sum(text.count("\n") for (_, text) in pages))
+            docs[slot][1].extend(pages if keep_raw else [(page_num, None) for (page_num, _) in pages])
+            docs[slot][2].extend(cleaned)
+            pending.extend((slot, text) for text in cleaned)
+            if len(pending) >= encode_batch:
+                encode_pending()
+        if pending:
+            encode_pending()
+    finally:
+        # The parser stops before its next document (or queue put), so no PDF stays open behind us
+        cancel.set()
+        parse_thread.join()
+
+def load_lexical_index(page_texts, cache_dir=None):
+    """BM25 index over the corpus pages, persisted in cache_dir when given.
+
+    The index is keyed by a hash of the cleaned page texts, so any change to
+    the documents (or to clean_text) builds a fresh one.
+    """
+    if not cache_dir:
+        return LexicalIndex.build(page_texts)
+
+    digest = hashlib.sha256("\0".join(page_texts).encode("utf-8")).hexdigest()
+    prefix = os.path.join(cache_dir, f"lexical-{digest[:24]}")
+    if os.path.exists(f"{prefix}.npz") and os.path.exists(f"{prefix}.vocab.json"):
+        return LexicalIndex.load(prefix)
+
+    lexical = LexicalIndex.build(page_texts)
+    os.makedirs(cache_dir, exist_ok=True)
+    lexical.save(prefix)
+    return lexical
+
+def lexical_scores(queries, texts, lexical=None, rows=None):
+    """Keyword score per text: BM25 from the corpus index, or the legacy
+    mean TF-IDF weight of a vectorizer fitted on the queries alone."""
+    if lexical is not None:
+        return lexical.score(queries, rows)
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    tfidf = TfidfVectorizer(stop_words='english')
+    tfidf.fit(queries)
+    return tfidf.transform(texts).mean(axis=1).A1
+
+def score_pages(page_embeddings, query_embeddings, keyword_scores):
+    """Hybrid score for every page at once.
+
+    Embeddings are L2-normalized, so one (pages x queries) matrix product gives
+    the cosine similarities; each page keeps its best query match.
+    """
+    semantic_scores = (page_embeddings @ query_embeddings.T).max(axis=1)
+    return 0.7 * semantic_scores + 0.3 * keyword_scores
+
+def select_top_pages(scores, doc_ids, k=5):
+    """Indices of the k best pages, at most one page per document, best first."""
+    # Best page of each document (earlier page wins ties, as with a stable sort)
+    doc_ids = np.asarray(doc_ids)
+    order = np.lexsort((np.arange(len(scores)), -scores, doc_ids))
+    first_of_doc = np.r_[True, doc_ids[order][1:] != doc_ids[order][:-1]]
+    best = order[first_of_doc]
+
+    if len(best) > k:
+        # Keep everything tied with the k-th best score so ties resolve by position
+        kth_score = scores[best][np.argpartition(-scores[best], k - 1)[k - 1]]
+        best = best[scores[best] >= kth_score]
+    order = np.lexsort((best, -scores[best]))
+    return best[order][:k].tolist()
+
+def parse_request(metadata):
+    """Return (input_docs, persona, job) from an input.json-style request."""
+    input_docs = [doc["filename"] for doc in metadata.get("documents", [])]
+    persona = metadata["persona"] if isinstance(metadata["persona"], str) else metadata["persona"]["role"]
+    job = metadata["job_to_be_done"] if isinstance(metadata["job_to_be_done"], str) else metadata["job_to_be_done"]["task"]
+    return input_docs, persona, job
+
+def build_queries(persona, job):
+    base_prompt = f"You are a {persona} and your goal is to {job}."
+    return [
+        base_prompt,
+        f"Which sections in the documents help a {persona} to {job}?",
+        f"What content should be used to {job}?",
+        f"Identify key suggestions, locations, or tips for: {job}",
+        f"Find relevant sections to achieve the goal: {job}"
+    ]
+
+def load_batch_requests(batch_path):
+    """Read persona/job requests from a directory of *.json files or a JSONL file.
+
+    Returns a list of (output_name, metadata). Each request may carry an "id"
+    field, which names its output file; otherwise the spec file stem or the
+    JSONL line number is used.
+    """
+    requests = []
+    if os.path.isdir(batch_path):
+        for filename in sorted(os.listdir(batch_path)):
+            if filename.endswith(".json"):
+                with open(os.path.join(batch_path, filename), encoding="utf-8") as f:
+                    metadata = json.load(f)
+                requests.append((metadata.get("id", os.path.splitext(filename)[0]), metadata))
+    else:
+        with open(batch_path, encoding="utf-8") as f:
+            for line_num, line in enumerate(f, 1):
+                if line.strip():
+                    metadata = json.loads(line)
+                    requests.append((metadata.get("id", f"request_{line_num:04d}"), metadata))
+
+    # Output names become file names in the output directory: no paths, no collisions
+    seen = set()
+    for i, (name, metadata) in enumerate(requests):
+        name = str(name)
+        if not name or name in (".", "..") or any(sep in name for sep in "/\\"):
+            raise ValueError(f"Request id {name!r} in {batch_path} is not a plain file name")
+        if name in seen:
+            raise ValueError(f"Duplicate request id {name!r} in {batch_path}")
+        seen.add(name)
+        requests[i] = (name, metadata)
+    return requests
+
+# Pages scored per block while streaming into the top-k ranker
+SCORE_CHUNK_PAGES = 4096
+
+def rank_request(input_docs, queries, query_embeddings, corpus, input_dir, k=5, lexical=None, per_doc=1):
+    """Score the corpus pages belonging to input_docs and return the top-k page dicts.
+
+    Semantic scores are computed block by block and streamed into a
+    StreamingTopK that keeps each document's best per_doc pages; only the
+    k winners get their raw text read back from the PDFs in input_dir. The
+    keyword scores stay one vector, since BM25 is scaled over all scored pages.
+    """
+    all_pages, doc_ids, page_texts, page_embeddings = corpus
+    wanted = set(input_docs)
+    subset = np.array([i for i, (doc_name, _) in enumerate(all_pages) if doc_name in wanted], dtype=int)
+    if len(subset) == 0:
+        return []
+
+    texts = None if lexical is not None else [page_texts[i] for i in subset]
+    keyword_scores = lexical_scores(queries, texts, lexical, subset)
+    doc_ids = np.asarray(doc_ids)
+    ranker = StreamingTopK(k, per_doc)
+    for start in range(0, len(subset), SCORE_CHUNK_PAGES):
+        rows = subset[start:start + SCORE_CHUNK_PAGES]
+        scores = score_pages(page_embeddings[rows], query_embeddings,
+                             keyword_scores[start:start + SCORE_CHUNK_PAGES])
+        ranker.push(scores, rows, doc_ids[rows])
+
+    winners = ranker.result()
+    raw_texts = fetch_page_texts(input_dir, [all_pages[row] for row, _ in winners])
+    return [
+        {
+            "document": all_pages[row][0],
+            "page_number": all_pages[row][1],
+            "text": raw_texts[all_pages[row]],
+            "score": float(score)
+        }
+        for row, score in winners
+    ]
+
+def build_output(input_docs, persona, job, final_ranked):
+    output = {
+        "metadata": {
+            "input_documents": input_docs,
+            "persona": persona,
+            "job_to_be_done": job,
+            "processing_timestamp": datetime.now().isoformat()
+        },
+        "extracted_sections": [],
+        "subsection_analysis": []
+    }
+
+    for rank, page in enumerate(final_ranked, 1):
+        heading = page.get("section_title") or extract_heading_candidates(page["text"])[0]
+        output["extracted_sections"].append({
+            "document": page["document"],
+            "section_title": heading,
+            "importance_rank": rank,
+            "page_number": page["page_number"]
+        })
+        output["subsection_analysis"].append({
+            "document": page["document"],
+            "refined_text": clean_text(page["text"]),
+            "page_number": page["page_number"]
+        })
+    return output
+
+def parse_arguments():
+    """Parse command line arguments for input and output directories."""
+    parser = argparse.ArgumentParser(description='Process PDF documents for persona-based content extraction')
+    
+    # Default to current directory structure for local development, Docker will override these
+    default_input = './input' if os.path.exists('./input') else '/app/input'
+    default_output = './output' if os.path.exists('./output') else '/app/output'
+    
+    parser.add_argument('--input-dir', '-i', default=default_input, 
+                       help='Input directory containing input.json and PDF files (default: ./input or /app/input)')
+    parser.add_argument('--output-dir', '-o', default=default_output, 
+                       help='Output directory for results (default: ./output or /app/output)')
+    parser.add_argument('--cache-dir', default=None,
+                       help='Directory for persistent page embeddings; reused across runs over the same PDFs')
+    parser.add_argument('--cache-dtype', choices=['float32', 'float16'], default='float32',
+                       help='Storage precision of cached embeddings (default: float32)')
+    parser.add_argument('--batch', default=None,
+                       help='Directory of request *.json files or a JSONL file of requests; '
+                            'PDFs are read from --input-dir and one <id>.json is written per request')
+    parser.add_argument('--encode-batch', type=int, default=256,
+                       help='Pages per encoder call, batched across documents (default: 256)')
+    parser.add_argument('--queue-size', type=int, default=8,
+                       help=f'Parsed page chunks ({PARSE_CHUNK_PAGES} pages each) buffered ahead of the encoder (default: 8)')
+    parser.add_argument('--lexical', choices=['bm25', 'tfidf'], default='bm25',
+                       help='Keyword signal: BM25 over a corpus-level index (default) or the legacy '
+                            'TF-IDF fitted on the query prompts')
+    parser.add_argument('--encoder', choices=ENCODERS, default='torch',
+                       help='Embedding runtime: torch (default), torch-int8, or the ONNX / int8 ONNX '
+                            'export produced by cache_models.py')
+    parser.add_argument('--threads', type=int, default=None, help='CPU threads for the encoder')
+    parser.add_argument('--top-k', type=int, default=5, help='Pages in each output (default: 5)')
+    parser.add_argument('--per-doc', type=int, default=1,
+                       help='At most this many of the top pages from one document (default: 1)')
+    parser.add_argument('--timings', action='store_true',
+                       help='Print per-stage timings and write the run report to timings.json in the output directory')
+    add_report_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    """Main function to orchestrate the PDF processing pipeline."""
+    try:
+        # Parse command line arguments
+        args = parse_arguments()
+        report = start_run_from_args("main_code", args, force=args.timings)
+        input_dir = args.input_dir
+        output_dir = args.output_dir
+
+        # Ensure output directory exists
+        os.makedirs(output_dir, exist_ok=True)
+
+        # SECTION 3: Load Metadata
+        if args.batch:
+            requests = load_batch_requests(args.batch)
+            if not requests:
+                print(f"Error: no requests found in {args.batch}")
+                sys.exit(1)
+        else:
+            metadata_path = os.path.join(input_dir, "input.json")
+            if not os.path.exists(metadata_path):
+                print(f"Error: metadata file not found at {metadata_path}")
+                sys.exit(1)
+
+            with open(metadata_path) as f:
+                requests = [("output", json.load(f))]
+
+        parsed = [(name, *parse_request(metadata)) for name, metadata in requests]
+
+        # Every document referenced by any request, parsed and embedded once
+        corpus_docs = list(dict.fromkeys(doc for _, input_docs, _, _ in parsed for doc in input_docs))
+
+        # SECTION 4: Dynamic Query Builder
+        request_queries = [build_queries(persona, job) for _, _, persona, job in parsed]
+
+        # SECTION 5: Load Sentence Embedding Model
+        print("Load sentence embedding model...")
+        with stage("model_load"):
+            model = load_encoder(MODEL_NAME, args.encoder, threads=args.threads)
+        record("cold_start", time.perf_counter() - PROCESS_START)
+
+        all_queries = [q for queries in request_queries for q in queries]
+        with stage("query_encode"):
+            all_query_embeddings = model.encode(all_queries, normalize_embeddings=True)
+
+        # SECTION 6: Process PDFs and Embed Pages
+        print("Processing PDF documents...")
+        store = None
+        if args.cache_dir:
+            # Quantized / ONNX runtimes give slightly different vectors, so they get their own entries
+            store_model = MODEL_NAME if args.encoder == 'torch' else f"{MODEL_NAME}-{args.encoder}"
+            store = EmbeddingStore(args.cache_dir, store_model, CLEAN_TEXT_VERSION, args.cache_dtype)
+
+        corpus = embed_corpus(input_dir, corpus_docs, model, store, args.encode_batch, args.queue_size)
+        if store:
+            print(f"Embedding cache: {store.hits} hits, {store.misses} misses")
+
+        if not corpus[0]:
+            print("Error: No valid pages found in any PDF documents")
+            sys.exit(1)
+
+        with stage("lexical_index"):
+            lexical = load_lexical_index(corpus[2], args.cache_dir) if args.lexical == 'bm25' else None
+        if lexical is not None:
+            # The BM25 index is all the keyword scoring needs; drop the cleaned page texts
+            corpus = (corpus[0], corpus[1], None, corpus[3])
+
+        start = 0
+        for (name, input_docs, persona, job), queries in zip(parsed, request_queries):
+            query_embeddings = all_query_embeddings[start:start + len(queries)]
+            start += len(queries)
+
+            # SECTION 7: Score Pages, Select Top Pages and Enforce Document Diversity
+            with stage("scoring"):
+                final_ranked = rank_request(input_docs, queries, query_embeddings, corpus, input_dir,
+                                            k=args.top_k, lexical=lexical, per_doc=args.per_doc)
+            if not final_ranked:
+                print(f"Error: No valid pages found for request {name}")
+                continue
+
+            # SECTION 8: Build Output JSON
+            output = build_output(input_docs, persona, job, final_ranked)
+
+            # SECTION 9: Save Output
+            output_path = os.path.join(output_dir, f"{name}.json")
+            with stage("output_write"), open(output_path, "w", encoding="utf-8") as f:
+                json.dump(output, f, indent=4, ensure_ascii=False)
+
+            print(f"Final Output saved to {output_path}")
+
+        if report:
+            if report.counters.get("pages_encoded"):
+                report.meta["page_encode_ms_per_page"] = round(
+                    1000 * report.stages["page_encode"]["seconds"] / report.counters["pages_encoded"], 3)
+                print(f"  page encode latency: {report.meta['page_encode_ms_per_page']} ms/page")
+            finish_run(args.report or (os.path.join(output_dir, "timings.json") if args.timings else None))
+        print("Process completed successfull!")
+
+    except Exception as e:
+        print(f"Error during processing: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
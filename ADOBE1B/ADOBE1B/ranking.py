@@ -0,0 +1,47 @@
+import heapq
+import numpy as np
+
+
+class StreamingTopK:
+    """Top-k pages with at most per_doc pages per document, fed block by block.
+
+    Only the best per_doc (score, row) pairs of each document are kept, in a
+    small min-heap per document, so memory stays O(documents * per_doc) no
+    matter how many pages are scored. Rows are integers into the corpus; the
+    page text is looked up afterwards for the winners only. Ties go to the
+    earlier row, like a stable sort on the score.
+    """
+
+    def __init__(self, k=5, per_doc=1):
+        if k < 1 or per_doc < 1:
+            raise ValueError("k and per_doc must be at least 1")
+        self.k = k
+        self.per_doc = per_doc
+        self.heaps = {}  # doc_id -> min-heap of (score, -row); the root is the doc's worst kept page
+
+    def push(self, scores, rows, doc_ids):
+        """Offer a block of scored pages (parallel arrays of scores, rows and document ids)."""
+        scores, rows, doc_ids = np.asarray(scores), np.asarray(rows), np.asarray(doc_ids)
+        if len(scores) == 0:
+            return
+
+        # Vectorized pre-selection: each document's best per_doc pages of this block
+        order = np.lexsort((rows, -scores, doc_ids))
+        sorted_docs = doc_ids[order]
+        starts = np.flatnonzero(np.r_[True, sorted_docs[1:] != sorted_docs[:-1]])
+        rank_in_doc = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        keep = order[rank_in_doc < self.per_doc]
+
+        for score, row, doc in zip(scores[keep].tolist(), rows[keep].tolist(), doc_ids[keep].tolist()):
+            heap = self.heaps.setdefault(doc, [])
+            entry = (score, -row)
+            if len(heap) < self.per_doc:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    def result(self):
+        """[(row, score)] of the k best pages kept, best first."""
+        best = heapq.nsmallest(self.k, ((-score, -neg_row) for heap in self.heaps.values()
+                                        for score, neg_row in heap))
+        return [(row, -neg_score) for neg_score, row in best]
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from numpy.lib.format import open_memmap
+from lexical_index import LexicalIndex
+from encoders import load_encoder, ENCODERS
+from main_code import (MODEL_NAME, clean_text, extract_pages, split_sections, parse_request,
+                       build_queries, score_pages, select_top_pages, build_output, load_batch_requests)
+
+# Sections with less cleaned text than this are not worth indexing
+MIN_SECTION_CHARS = 30
+
+INDEX_FILE = "sections.hnsw"
+EMBEDDINGS_FILE = "embeddings.npy"
+SECTIONS_FILE = "sections.jsonl"
+INFO_FILE = "index_info.json"
+LEXICAL_PREFIX = "lexical"
+
+
+def iter_library_sections(library_dir):
+    """Yield (document, page_number, title, raw_text) for every section of every PDF."""
+    for doc_name in sorted(f for f in os.listdir(library_dir) if f.lower().endswith(".pdf")):
+        print(f"Processing: {doc_name}")
+        try:
+            pages = extract_pages(os.path.join(library_dir, doc_name))
+        except Exception as e:
+            print(f"Warning: skipping {doc_name}: {e}")
+            continue
+        for page_num, page_text in pages:
+            for title, text in split_sections(page_text):
+                if len(clean_text(text)) >= MIN_SECTION_CHARS:
+                    yield doc_name, page_num, title, text
+
+
+def build_index(library_dir, index_dir, batch_size=1024, ef_construction=200, M=16, encoder="torch"):
+    import hnswlib
+
+    os.makedirs(index_dir, exist_ok=True)
+    sections = list(iter_library_sections(library_dir))
+    if not sections:
+        print(f"Error: no sections found in {library_dir}")
+        sys.exit(1)
+
+    model = load_encoder(MODEL_NAME, encoder)
+    dim = model.get_sentence_embedding_dimension()
+
+    # Embeddings go straight to a memory-mapped .npy so exact re-scoring of
+    # candidates at query time never needs the whole matrix in RAM.
+    embeddings = open_memmap(os.path.join(index_dir, EMBEDDINGS_FILE), mode="w+",
+                             dtype=np.float32, shape=(len(sections), dim))
+    index = hnswlib.Index(space="ip", dim=dim)  # inner product on normalized vectors = cosine
+    index.init_index(max_elements=len(sections), ef_construction=ef_construction, M=M)
+
+    for start in range(0, len(sections), batch_size):
+        batch = sections[start:start + batch_size]
+        vectors = model.encode([clean_text(text) for (_, _, _, text) in batch],
+                               batch_size=64, normalize_embeddings=True)
+        embeddings[start:start + len(batch)] = vectors
+        index.add_items(vectors, np.arange(start, start + len(batch)))
+        print(f"Indexed {start + len(batch)}/{len(sections)} sections")
+    embeddings.flush()
+
+    index.save_index(os.path.join(index_dir, INDEX_FILE))
+    LexicalIndex.build([clean_text(text) for (_, _, _, text) in sections]).save(
+        os.path.join(index_dir, LEXICAL_PREFIX))
+    with open(os.path.join(index_dir, SECTIONS_FILE), "w", encoding="utf-8") as f:
+        for doc_name, page_num, title, text in sections:
+            f.write(json.dumps({"document": doc_name, "page_number": page_num,
+                                "title": title, "text": text}, ensure_ascii=False) + "\n")
+    with open(os.path.join(index_dir, INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump({"model": MODEL_NAME, "encoder": encoder, "dim": dim, "count": len(sections)}, f, indent=4)
+    print(f"Index with {len(sections)} sections saved to {index_dir}")
+
+
+class SectionIndex:
+    def __init__(self, index_dir, ef=200):
+        import hnswlib
+
+        with open(os.path.join(index_dir, INFO_FILE), encoding="utf-8") as f:
+            self.info = json.load(f)
+        self.index = hnswlib.Index(space="ip", dim=self.info["dim"])
+        self.index.load_index(os.path.join(index_dir, INDEX_FILE), max_elements=self.info["count"])
+        self.index.set_ef(ef)
+        self.embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        self.lexical = LexicalIndex.load(os.path.join(index_dir, LEXICAL_PREFIX))
+        with open(os.path.join(index_dir, SECTIONS_FILE), encoding="utf-8") as f:
+            self.sections = [json.loads(line) for line in f]
+        documents = np.array([section["document"] for section in self.sections])
+        self.doc_sections = {doc: np.flatnonzero(documents == doc) for doc in np.unique(documents)}
+
+    def candidates(self, query_embeddings, k, documents=None):
+        """Union of the k nearest sections of each query, restricted to documents if given.
+
+        The restriction is applied inside the HNSW search (filter predicate), so
+        all k hits come from the requested documents. If those documents have no
+        more than k sections, or the filtered search cannot find k of them, all
+        their sections are returned and scored exactly instead.
+        """
+        if not documents:
+            k = min(k, self.info["count"])
+            labels, _ = self.index.knn_query(query_embeddings, k=k)
+            return np.unique(labels)
+
+        allowed = np.unique(np.concatenate(
+            [self.doc_sections.get(doc, np.empty(0, dtype=int)) for doc in documents]))
+        if len(allowed) <= k:
+            return allowed
+        allowed_set = set(allowed.tolist())
+        try:
+            # Python filter callbacks need a single search thread
+            labels, _ = self.index.knn_query(query_embeddings, k=k, num_threads=1,
+                                             filter=allowed_set.__contains__)
+        except RuntimeError:  # fewer than k reachable hits
+            return allowed
+        return np.unique(labels)
+
+
+def query_index(index, model, metadata, candidates=200, top_k=5):
+    # An empty document list means "search the whole library"
+    input_docs, persona, job = parse_request(metadata)
+    queries = build_queries(persona, job)
+    query_embeddings = model.encode(queries, normalize_embeddings=True)
+
+    ids = index.candidates(query_embeddings, candidates, input_docs)
+    if len(ids) == 0:
+        return build_output(input_docs, persona, job, [])
+
+    # Exact 0.7/0.3 semantic/BM25 blend, applied to the candidates only
+    keyword_scores = index.lexical.score(queries, ids)
+    scores = score_pages(np.asarray(index.embeddings[ids]), query_embeddings, keyword_scores)
+
+    doc_names = [index.sections[i]["document"] for i in ids]
+    doc_ids = np.unique(doc_names, return_inverse=True)[1]
+    final_ranked = []
+    for j in select_top_pages(scores, doc_ids, k=top_k):
+        section = index.sections[ids[j]]
+        final_ranked.append({
+            "document": section["document"],
+            "page_number": section["page_number"],
+            "section_title": section["title"],
+            "text": section["text"],
+            "score": float(scores[j])
+        })
+    return build_output(input_docs, persona, job, final_ranked)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Section-level ANN index over a PDF library')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='Split PDFs into sections and build the HNSW index')
+    build.add_argument('--library-dir', '-l', required=True, help='Directory containing the PDF library')
+    build.add_argument('--index-dir', '-x', required=True, help='Where to write the index')
+    build.add_argument('--batch-size', type=int, default=1024, help='Sections encoded per batch')
+    build.add_argument('--encoder', choices=ENCODERS, default='torch', help='Embedding runtime')
+
+    query = sub.add_parser('query', help='Answer persona/job requests from the index')
+    query.add_argument('--index-dir', '-x', required=True, help='Index built with the build command')
+    query.add_argument('--input', required=True,
+                       help='input.json-style request, or a directory of them / JSONL file')
+    query.add_argument('--output-dir', '-o', required=True, help='Output directory for results')
+    query.add_argument('--candidates', type=int, default=200,
+                       help='Nearest sections retrieved per query prompt before re-scoring')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.command == 'build':
+        build_index(args.library_dir, args.index_dir, args.batch_size, encoder=args.encoder)
+        return
+
+    if os.path.isfile(args.input) and args.input.endswith(".json"):
+        with open(args.input, encoding="utf-8") as f:
+            requests = [("output", json.load(f))]
+    else:
+        requests = load_batch_requests(args.input)
+
+    index = SectionIndex(args.index_dir)
+    # Queries must be encoded with the same runtime the index was built with
+    model = load_encoder(MODEL_NAME, index.info.get("encoder", "torch"))
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, metadata in requests:
+        output = query_index(index, model, metadata, args.candidates)
+        output_path = os.path.join(args.output_dir, f"{name}.json")
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=4, ensure_ascii=False)
+        print(f"Final Output saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
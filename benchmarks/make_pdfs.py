@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import random
+
+# === CONFIG ===
+OUTPUT_DIR = "bench_corpus"
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+
+# Topic vocabularies, so the ADOBE1B requests have something to rank
+TOPICS = {
+    "travel": "trip itinerary hotel beach city museum train flight budget restaurant nightlife tour guide "
+              "coast castle festival packing day visit local wine market",
+    "cooking": "recipe dinner vegetarian buffet ingredients oven salad sauce garlic tomato pasta rice "
+               "gluten-free menu dessert spice bake serve portion fresh",
+    "forms": "form fillable field signature acrobat document onboarding compliance checkbox export "
+             "share review request sign template data field text employee",
+    "finance": "revenue quarter report growth margin forecast investment cash flow balance sheet audit "
+               "tax expense profit dividend market risk portfolio asset",
+}
+FILLER = "the a of and to in for with on is are this that by from as at be can will each more".split()
+
+REQUESTS = [
+    ("Travel Planner", "Plan a trip of 4 days for a group of 10 college friends.", "travel"),
+    ("Food Contractor", "Prepare a vegetarian buffet-style dinner menu for a corporate gathering.", "cooking"),
+    ("HR professional", "Create and manage fillable forms for onboarding and compliance.", "forms"),
+    ("Investment Analyst", "Analyze revenue trends and investment strategies for the last quarter.", "finance"),
+]
+
+
+def sentence(rng, words, n_words):
+    picked = [rng.choice(words) if rng.random() < 0.6 else rng.choice(FILLER) for _ in range(n_words)]
+    return " ".join(picked).capitalize()
+
+
+def wrap(text, font, fontsize, width):
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and font.text_length(candidate, fontsize=fontsize) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def make_pdf(path, rng, topic, n_pages, heading_sizes, body_size, bullet_ratio):
+    """Write one PDF: a title, numbered headings on len(heading_sizes)-1 levels, body text and bullets."""
+    import fitz
+
+    words = TOPICS[topic].split()
+    width = PAGE_WIDTH - 2 * MARGIN
+    # Embedded fonts via TextWriter, so bullets and dashes survive as real unicode
+    fonts = {name: fitz.Font(name) for name in ("helv", "hebo", "heit")}
+    doc = fitz.open()
+    numbering = [0] * len(heading_sizes)
+    counts = {"lines": 0, "headings": 0, "bullets": 0}
+
+    for page_index in range(n_pages):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        writer = fitz.TextWriter(page.rect)
+        y = MARGIN
+
+        def emit(text, fontname, fontsize, indent=0):
+            nonlocal y
+            for line in wrap(text, fonts[fontname], fontsize, width - indent):
+                if y + fontsize > PAGE_HEIGHT - MARGIN:
+                    return False
+                y += fontsize * 1.3
+                writer.append((MARGIN + indent, y), line, font=fonts[fontname], fontsize=fontsize)
+                counts["lines"] += 1
+            return True
+
+        if page_index == 0:
+            emit(f"{topic.title()} Guide {sentence(rng, words, 3)}", "hebo", heading_sizes[0])
+            y += heading_sizes[0] * 0.5
+
+        while y < PAGE_HEIGHT - MARGIN - 4 * body_size:
+            roll = rng.random()
+            if roll < 0.2:
+                # Deeper levels are more frequent than top-level headings
+                level = min(int(rng.random() ** 0.7 * (len(heading_sizes) - 1)) + 1, len(heading_sizes) - 1)
+                numbering[level] += 1
+                numbering[level + 1:] = [0] * (len(numbering) - level - 1)
+                number = ".".join(str(max(n, 1)) for n in numbering[1:level + 1])
+                y += heading_sizes[level] * 0.4
+                if not emit(f"{number} {sentence(rng, words, rng.randint(2, 6))}", "hebo", heading_sizes[level]):
+                    break
+                counts["headings"] += 1
+            elif roll < 0.2 + bullet_ratio:
+                marker = rng.choice(["•", "–", "-", "*"])
+                if not emit(f"{marker} {sentence(rng, words, rng.randint(4, 12))}", "helv", body_size, indent=12):
+                    break
+                counts["bullets"] += 1
+            else:
+                paragraph = ". ".join(sentence(rng, words, rng.randint(6, 16)) for _ in range(rng.randint(1, 4)))
+                if not emit(paragraph + ".", "heit" if rng.random() < 0.05 else "helv", body_size):
+                    break
+        writer.write_text(page)
+
+    doc.save(path)
+    doc.close()
+    return counts
+
+
+def write_requests(output_dir, filenames):
+    documents = [{"filename": name, "title": os.path.splitext(name)[0]} for name in filenames]
+    requests = [{
+        "id": f"request_{i:02d}",
+        "documents": documents,
+        "persona": {"role": role},
+        "job_to_be_done": {"task": task},
+    } for i, (role, task, _) in enumerate(REQUESTS)]
+
+    with open(os.path.join(output_dir, "input.json"), "w", encoding="utf-8") as f:
+        json.dump({k: v for k, v in requests[0].items() if k != "id"}, f, indent=4)
+    with open(os.path.join(output_dir, "requests.jsonl"), "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
+
+
+def parse_page_range(value):
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Generate a synthetic PDF corpus for the benchmarks")
+    parser.add_argument("--output-dir", "-o", default=OUTPUT_DIR, help=f"Where to write the PDFs (default: {OUTPUT_DIR})")
+    parser.add_argument("--docs", type=int, default=20, help="Number of PDFs")
+    parser.add_argument("--pages", type=parse_page_range, default=(5, 40),
+                        help="Pages per PDF, a number or a MIN-MAX range (default: 5-40)")
+    parser.add_argument("--heading-sizes", default="24,18,14,12",
+                        help="Font sizes of the title and each heading level, largest first")
+    parser.add_argument("--body-size", type=float, default=10, help="Body text font size")
+    parser.add_argument("--bullet-ratio", type=float, default=0.15, help="Share of blocks that are bullet items")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same corpus")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    heading_sizes = [float(size) for size in args.heading_sizes.split(",")]
+    if len(heading_sizes) < 2:
+        raise SystemExit(" --heading-sizes needs a title size and at least one heading level")
+
+    rng = random.Random(args.seed)
+    os.makedirs(args.output_dir, exist_ok=True)
+    topics = sorted(TOPICS)
+    filenames = []
+    total_pages = total_lines = 0
+    for i in range(args.docs):
+        topic = topics[i % len(topics)]
+        name = f"{topic}_{i:04d}.pdf"
+        n_pages = rng.randint(*args.pages)
+        counts = make_pdf(os.path.join(args.output_dir, name), rng, topic, n_pages,
+                          heading_sizes, args.body_size, args.bullet_ratio)
+        filenames.append(name)
+        total_pages += n_pages
+        total_lines += counts["lines"]
+
+    write_requests(args.output_dir, filenames)
+    print(f" Wrote {args.docs} PDFs ({total_pages} pages, {total_lines} lines) to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
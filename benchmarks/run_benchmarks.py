@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# === CONFIG ===
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADOBE1A_APP = os.path.join(ROOT, "ADOBE1A1", "ADOBE1A", "app")
+ADOBE1B_DIR = os.path.join(ROOT, "ADOBE1B", "ADOBE1B")
+OUTPUT_JSON = "bench_results.json"
+
+# Stages run in this order; each one reads what the previous stage of its project wrote
+STAGES = ["1a_extract", "1a_predict", "1a_outline", "1b_parse", "1b_encode", "1b_score"]
+
+
+# ---------------------------------------------------------------------------
+# Stage workers: each runs in its own process so peak RSS is per stage
+# ---------------------------------------------------------------------------
+
+def list_pdfs(corpus):
+    return sorted(f for f in os.listdir(corpus) if f.lower().endswith(".pdf"))
+
+
+def timed_docs(items, fn):
+    """Run fn(item) for every item; return the results and per-item latencies in seconds."""
+    results, latencies = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(fn(item))
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+
+def stage_1a_extract(args):
+    import pandas as pd
+    from extract_features import extract_pdf_features, count_pdf_pages
+
+    def run(name):
+        df = extract_pdf_features(os.path.join(args.corpus, name), backend=args.backend)
+        df.insert(0, "pdf_file", name)
+        return df
+
+    names = list_pdfs(args.corpus)
+    # Pages are counted with the backend being measured, and outside the timed work (as setup)
+    start = time.perf_counter()
+    pages = sum(count_pdf_pages(os.path.join(args.corpus, name), args.backend) for name in names)
+    setup = time.perf_counter() - start
+
+    frames, latencies = timed_docs(names, run)
+    df = pd.concat(frames, ignore_index=True)
+    df.to_pickle(os.path.join(args.work_dir, "features.pkl"))
+    return {"docs": len(names), "pages": pages, "lines": len(df), "latencies": latencies, "setup_s": setup}
+
+
+def stage_1a_predict(args):
+    import pandas as pd
+    from predict_labels import load_model, predict_labels
+
+    start = time.perf_counter()
+    model, le = load_model(os.path.join(ADOBE1A_APP, "model"), native=args.native)
+    setup = time.perf_counter() - start
+
+    df = pd.read_pickle(os.path.join(args.work_dir, "features.pkl"))
+    groups = [group for _, group in df.groupby("pdf_file", sort=True)]
+    labels, latencies = timed_docs(groups, lambda group: predict_labels(group, model, le))
+    df = pd.concat([group.assign(label=label) for group, label in zip(groups, labels)], ignore_index=True)
+    df.to_pickle(os.path.join(args.work_dir, "predicted.pkl"))
+    pages = int(df.groupby("pdf_file")["page"].nunique().sum())
+    return {"docs": len(groups), "pages": pages, "lines": len(df), "latencies": latencies, "setup_s": setup}
+
+
+def stage_1a_outline(args):
+    import pandas as pd
+    from structure_jsonoutput import build_outline, write_outline
+
+    df = pd.read_pickle(os.path.join(args.work_dir, "predicted.pkl"))
+    output_dir = os.path.join(args.work_dir, "outline")
+    os.makedirs(output_dir, exist_ok=True)
+    groups = list(df.groupby("pdf_file", sort=True))
+    _, latencies = timed_docs(groups, lambda item: write_outline(output_dir, item[0], build_outline(item[1], item[0])))
+    pages = int(df.groupby("pdf_file")["page"].nunique().sum())
+    return {"docs": len(groups), "pages": pages, "lines": len(df), "latencies": latencies, "setup_s": 0.0}
+
+
+def stage_1b_parse(args):
+    import pickle
+    from main_code import extract_pages
+
+    names = list_pdfs(args.corpus)
+    docs, latencies = timed_docs(names, lambda name: extract_pages(os.path.join(args.corpus, name)))
+    with open(os.path.join(args.work_dir, "pages.pkl"), "wb") as f:
+        pickle.dump(list(zip(names, docs)), f)
+    pages = sum(len(doc) for doc in docs)
+    lines = sum(text.count("\n") for doc in docs for (_, text) in doc)
+    return {"docs": len(names), "pages": pages, "lines": lines, "latencies": latencies, "setup_s": 0.0}
+
+
+def stage_1b_encode(args):
+    import pickle
+    import numpy as np
+    from main_code import MODEL_NAME, clean_text
+    from encoders import load_encoder
+
+    start = time.perf_counter()
+    model = load_encoder(MODEL_NAME, args.encoder, threads=args.threads)
+    setup = time.perf_counter() - start
+
+    with open(os.path.join(args.work_dir, "pages.pkl"), "rb") as f:
+        docs = pickle.load(f)
+    encode = lambda item: model.encode([clean_text(text) for (_, text) in item[1]],
+                                       batch_size=64, normalize_embeddings=True)
+    embeddings, latencies = timed_docs([item for item in docs if item[1]], encode)
+    np.save(os.path.join(args.work_dir, "embeddings.npy"), np.vstack(embeddings).astype(np.float32))
+    pages = sum(len(pages) for (_, pages) in docs)
+    lines = sum(text.count("\n") for (_, pages) in docs for (_, text) in pages)
+    return {"docs": len(docs), "pages": pages, "lines": lines, "latencies": latencies, "setup_s": setup}
+
+
+def stage_1b_score(args):
+    """Latency here is per request (one persona/job against the whole corpus), not per document."""
+    import pickle
+    import numpy as np
+    from main_code import (MODEL_NAME, clean_text, build_queries, parse_request, rank_request,
+                           build_output, load_batch_requests)
+    from encoders import load_encoder
+    from lexical_index import LexicalIndex
+
+    start = time.perf_counter()
+    model = load_encoder(MODEL_NAME, args.encoder, threads=args.threads)
+    with open(os.path.join(args.work_dir, "pages.pkl"), "rb") as f:
+        docs = pickle.load(f)
+    all_pages = [(name, page_num) for name, pages in docs for (page_num, _) in pages]
+    doc_index = {}
+    doc_ids = [doc_index.setdefault(name, len(doc_index)) for (name, _) in all_pages]
+    page_texts = [clean_text(text) for _, pages in docs for (_, text) in pages]
+    lexical = LexicalIndex.build(page_texts)
+    corpus = (all_pages, doc_ids, None, np.load(os.path.join(args.work_dir, "embeddings.npy")))
+    lines_per_request = sum(text.count("\n") for _, pages in docs for (_, text) in pages)
+    del docs, page_texts
+    setup = time.perf_counter() - start
+
+    def run(metadata):
+        input_docs, persona, job = parse_request(metadata)
+        queries = build_queries(persona, job)
+        query_embeddings = model.encode(queries, normalize_embeddings=True)
+        final_ranked = rank_request(input_docs, queries, query_embeddings, corpus, args.corpus,
+                                    k=5, lexical=lexical)
+        return build_output(input_docs, persona, job, final_ranked)
+
+    requests = [metadata for _, metadata in load_batch_requests(os.path.join(args.corpus, "requests.jsonl"))]
+    requests = (requests * args.repeat) or requests
+    _, latencies = timed_docs(requests, run)
+    lines = lines_per_request * len(requests)
+    return {"docs": len(requests), "pages": len(all_pages) * len(requests), "lines": lines,
+            "latencies": latencies, "setup_s": setup}
+
+
+STAGE_FUNCTIONS = {
+    "1a_extract": (ADOBE1A_APP, stage_1a_extract),
+    "1a_predict": (ADOBE1A_APP, stage_1a_predict),
+    "1a_outline": (ADOBE1A_APP, stage_1a_outline),
+    "1b_parse": (ADOBE1B_DIR, stage_1b_parse),
+    "1b_encode": (ADOBE1B_DIR, stage_1b_encode),
+    "1b_score": (ADOBE1B_DIR, stage_1b_score),
+}
+
+
+def run_worker(args):
+    import resource
+    import numpy as np
+
+    project_dir, fn = STAGE_FUNCTIONS[args.worker]
+    sys.path.insert(0, project_dir)
+
+    start = time.perf_counter()
+    raw = fn(args)
+    wall = time.perf_counter() - start - raw["setup_s"]
+
+    latencies_ms = np.array(raw.pop("latencies")) * 1000
+    result = dict(raw)
+    result["wall_s"] = round(wall, 4)
+    result["setup_s"] = round(raw["setup_s"], 4)
+    result["pages_per_s"] = round(raw["pages"] / wall, 2) if wall > 0 else None
+    result["lines_per_s"] = round(raw["lines"] / wall, 2) if wall > 0 else None
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_rss_mb"] = round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    if len(latencies_ms):
+        result["latency_ms"] = {
+            "p50": round(float(np.percentile(latencies_ms, 50)), 3),
+            "p95": round(float(np.percentile(latencies_ms, 95)), 3),
+            "max": round(float(latencies_ms.max()), 3),
+        }
+    print(json.dumps(result))
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage(stage, args, work_dir):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", stage, "--corpus", args.corpus,
+           "--work-dir", work_dir, "--backend", args.backend, "--encoder", args.encoder,
+           "--repeat", str(args.repeat)]
+    if args.native:
+        cmd.append("--native")
+    if args.threads:
+        cmd += ["--threads", str(args.threads)]
+
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+        return {"error": error}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n Against {baseline_path} (commit {baseline.get('git_commit')}):")
+    for stage, now in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or "error" in now or "error" in before:
+            continue
+        speed = now["pages_per_s"] / before["pages_per_s"] if before.get("pages_per_s") else float("nan")
+        p95_now = now.get("latency_ms", {}).get("p95")
+        p95_before = before.get("latency_ms", {}).get("p95")
+        p95 = f"{p95_before:.1f} -> {p95_now:.1f} ms" if p95_now is not None and p95_before is not None else "-"
+        print(f"   {stage:<11} throughput x{speed:5.2f}   p95 {p95}   "
+              f"rss {before['peak_rss_mb']:.0f} -> {now['peak_rss_mb']:.0f} MB")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Throughput, latency and memory benchmarks for ADOBE1A and ADOBE1B")
+    parser.add_argument("--corpus", "-c", required=True, help="Folder of PDFs, e.g. from make_pdfs.py")
+    parser.add_argument("--output", "-o", default=OUTPUT_JSON, help=f"Results JSON (default: {OUTPUT_JSON})")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument("--backend", default="pdfminer", help="ADOBE1A extraction backend")
+    parser.add_argument("--native", action="store_true", help="ADOBE1A: predict with the native Booster")
+    parser.add_argument("--encoder", default="torch", help="ADOBE1B embedding runtime")
+    parser.add_argument("--threads", type=int, default=None, help="ADOBE1B encoder threads")
+    parser.add_argument("--repeat", type=int, default=5, help="Times each request is scored in 1b_score")
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to compare against")
+    parser.add_argument("--work-dir", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", choices=STAGES, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    args.corpus = os.path.abspath(args.corpus)
+    if args.worker:
+        run_worker(args)
+        return
+
+    stages = [stage for stage in STAGES if stage in args.stages.split(",")]
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    results = {
+        "git_commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": {"path": args.corpus, "pdfs": len(list_pdfs(args.corpus))},
+        "settings": {"backend": args.backend, "native": args.native, "encoder": args.encoder,
+                     "threads": args.threads, "repeat": args.repeat},
+        "stages": {},
+    }
+    try:
+        for stage in stages:
+            print(f" Running {stage}...")
+            result = run_stage(stage, args, work_dir)
+            results["stages"][stage] = result
+            if "error" in result:
+                print(f"   failed: {result['error']}")
+            else:
+                latency = result.get("latency_ms", {})
+                print(f"   {result['pages_per_s']} pages/s, {result['lines_per_s']} lines/s, "
+                      f"p50 {latency.get('p50')} ms, p95 {latency.get('p95')} ms, "
+                      f"peak RSS {result['peak_rss_mb']} MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f" Results saved to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()